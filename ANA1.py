@@ -1,3 +1,11 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 def validate_regex(regex):
     """
     验证正则表达式的语法是否合法
@@ -13,8 +21,11 @@ def validate_regex(regex):
         return -1
         
     stack = []  # 用于括号匹配的栈
+    skip_to = -1  # 计数重复 {m,n} 的内容已经整体检查过，跳过到右花括号为止
     
     for i, char in enumerate(regex):
+        if i <= skip_to:
+            continue
         if char == '(':
             stack.append(('(', i))  # 记录左括号的类型和位置
         elif char == ')':
@@ -31,11 +42,26 @@ def validate_regex(regex):
             # * 必须跟在字符或右括号后面
             if i == 0 or regex[i-1] in '(|':
                 return i  # 返回错误位置
-        # 此处正闭包与加号冲突 暂时保留 不处理 也就是 在该语法中 正闭包不合法 需要单独表示为a|a*
-        #elif char == '+':
+        elif char == '+':
             # + 必须跟在字符或右括号后面
-        #       if i == 0 or regex[i-1] in '(|':
-              #  return i  # 返回错误位置
+            if i == 0 or regex[i-1] in '(|':
+                return i  # 返回错误位置
+        elif char == '{':
+            # {m}、{m,} 或 {m,n} 必须跟在字符或右括号后面，且 m <= n
+            if i == 0 or regex[i-1] in '(|':
+                return i
+            end = regex.find('}', i)
+            if end == -1:
+                return i
+            low, sep, high = regex[i+1:end].partition(',')
+            if not low.isdigit() or (high and not high.isdigit()):
+                return i
+            if high and int(high) < int(low):
+                return i
+            skip_to = end
+        elif char == '}':
+            # 没有对应 { 的右花括号
+            return i
         elif char == '?':
             # ? 必须跟在字符或右括号后面
             if i == 0 or regex[i-1] in '(|':
@@ -58,12 +84,153 @@ def validate_regex(regex):
     
     # 检查未匹配的左括号
     if stack:
-        return stack[0]  # 返回第一个未匹配的左括号位置
+        return stack[0][1]  # 返回第一个未匹配的左括号位置
     
     # 通过所有检查，表达式合法
     return -1
 
+def validate_chunk(patterns):
+    """验证一批正则表达式，供进程池中的工作进程调用"""
+    return [validate_regex(pattern) for pattern in patterns]
+
+def iter_patterns(paths):
+    """
+    逐行读取正则表达式，不会把整个文件读入内存
+
+    参数:
+        paths: 文件路径列表，'-' 表示标准输入；为空时读取标准输入
+
+    返回:
+        生成 (来源, 行号, 正则表达式) 的迭代器，行号从 1 开始
+    """
+    for path in paths or ['-']:
+        if path == '-':
+            source, stream = '<stdin>', sys.stdin
+        else:
+            source, stream = path, open(path, encoding='utf-8', errors='replace')
+        try:
+            for line_no, line in enumerate(stream, 1):
+                yield source, line_no, line.rstrip('\r\n')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+def _chunks(items, size):
+    """把迭代器按固定大小分块"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_stream(records, workers=None, chunk_size=20000, cache_size=1000000):
+    """
+    批量验证正则表达式
+
+    主进程按块读取输入，块内和已缓存的重复表达式只验证一次，
+    其余表达式分块交给进程池验证。同时在途的块数有上限，内存占用与输入大小无关，
+    结果按输入顺序返回。
+
+    参数:
+        records: (来源, 行号, 正则表达式) 的迭代器，例如 iter_patterns 的返回值
+        workers: 工作进程数，为 1 时在当前进程中验证；None 表示使用CPU核数
+        chunk_size: 每个任务包含的行数
+        cache_size: 去重缓存保留的表达式个数上限
+
+    返回:
+        生成 (来源, 行号, 正则表达式, 错误位置) 的迭代器，错误位置含义同 validate_regex
+    """
+    cache = {}
+
+    def finish(chunk, todo, results):
+        computed = dict(zip(todo, results))
+        cache.update(computed)
+        while len(cache) > cache_size:
+            del cache[next(iter(cache))]  # 淘汰最早加入的表达式
+        for source, line_no, pattern in chunk:
+            result = computed.get(pattern)
+            if result is None:
+                result = cache.get(pattern)
+                if result is None:
+                    result = validate_regex(pattern)
+            yield source, line_no, pattern, result
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(records, chunk_size):
+            todo = [p for p in dict.fromkeys(r[2] for r in chunk) if p not in cache]
+            yield from finish(chunk, todo, validate_chunk(todo))
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            todo = [p for p in dict.fromkeys(r[2] for r in chunk) if p not in cache]
+            pending.append((chunk, todo, pool.submit(validate_chunk, todo)))
+            if len(pending) >= 2 * workers:
+                chunk, todo, future = pending.popleft()
+                yield from finish(chunk, todo, future.result())
+        while pending:
+            chunk, todo, future = pending.popleft()
+            yield from finish(chunk, todo, future.result())
+
+def run_batch(paths, output, workers=None, chunk_size=20000, report_all=False):
+    """
+    批量验证并输出JSON Lines报告，每行一个对象:
+        {"source": 来源, "line": 行号, "pattern": 表达式, "valid": 是否合法, "offset": 错误位置或null}
+    默认只输出不合法的表达式。返回统计信息字典。
+    """
+    total = invalid = 0
+    begin = time.perf_counter()
+    for source, line_no, pattern, result in validate_stream(
+            iter_patterns(paths), workers=workers, chunk_size=chunk_size):
+        total += 1
+        if result != -1:
+            invalid += 1
+        elif not report_all:
+            continue
+        output.write(json.dumps({
+            'source': source,
+            'line': line_no,
+            'pattern': pattern,
+            'valid': result == -1,
+            'offset': None if result == -1 else result,
+        }, ensure_ascii=False) + '\n')
+    elapsed = time.perf_counter() - begin
+    return {
+        'total': total,
+        'invalid': invalid,
+        'seconds': elapsed,
+        'per_minute': total / elapsed * 60 if elapsed > 0 else 0.0,
+    }
+
+def batch_main(argv=None):
+    parser = argparse.ArgumentParser(description="批量验证正则表达式语法，每行一个表达式")
+    parser.add_argument('--batch', action='store_true', help="批量模式")
+    parser.add_argument('files', nargs='*', help="输入文件，省略或 - 表示标准输入")
+    parser.add_argument('-o', '--output', help="JSON Lines 报告文件，默认输出到标准输出")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--chunk-size', type=int, default=20000, help="每个任务包含的行数")
+    parser.add_argument('--all', action='store_true', help="同时输出合法的表达式")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        stats = run_batch(args.files, output, workers=args.workers,
+                          chunk_size=args.chunk_size, report_all=args.all)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"共 {stats['total']} 个表达式，不合法 {stats['invalid']} 个，"
+          f"耗时 {stats['seconds']:.2f}s（{stats['per_minute']:.0f} 个/分钟）", file=sys.stderr)
+
 def main():
+    if '--batch' in sys.argv[1:]:
+        batch_main()
+        return
     regex = input("请输入一个正则表达式: ")
     result = validate_regex(regex)
     if result == -1:
@@ -2,9 +2,16 @@ import graphviz
 import io
 from PIL import Image
 import gradio as gr
+from table_export import TransitionTable, export_table, iter_html
+from nfa_reduce import reduce_nfa, format_report
+from gradio_backend import async_handler, add_controls, enable_queue
+
+PAGE_SIZE = 200  # 状态转移表每页显示的行数
 
 class State:
     """表示自动机中的一个状态"""
+    __slots__ = ('id', 'transitions', 'is_end', 'epsilon_moves')
+
     def __init__(self, id):
         self.id = id
         self.transitions = {}  # 存储状态转移: symbol -> [target_states]
@@ -49,38 +56,8 @@ class NFA:
     
     def get_transition_table(self):
         """获取状态转移表"""
-        table = []
-        # 表头行
-        header = ["状态ID", "是否接受状态"]
-        symbols = sorted(list(self.alphabet))
-        header.extend(symbols)
-        header.append('ε')
-        table.append(header)
-        
-        # 添加每个状态的转移信息
-        for state in self.states:
-            row = [f"q{state.id}", "是" if state.is_end else "否"]
-            
-            # 添加每个符号的转移
-            for symbol in symbols:
-                if symbol in state.transitions:
-                    targets = state.transitions[symbol]
-                    targets_str = ",".join([f"q{t.id}" for t in targets])
-                    row.append(targets_str)
-                else:
-                    row.append("-")
-            
-            # 添加ε转移
-            if 'ε' in state.transitions:
-                targets = state.transitions['ε']
-                targets_str = ",".join([f"q{t.id}" for t in targets])
-                row.append(targets_str)
-            else:
-                row.append("-")
-                
-            table.append(row)
-            
-        return table
+        table = TransitionTable(self, epsilon_column=True)
+        return [table.header()] + list(table.rows())
 
 def regex_to_nfa(regex):
     """将正则表达式转换为NFA"""
@@ -347,37 +324,26 @@ def visualize_nfa(nfa):
 
 def render_transition_table(table):
     """将状态转移表格式化为HTML"""
-    html = "<table border='1' cellpadding='5'>"
-    
-    # 添加表头
-    html += "<tr>"
-    for header in table[0]:
-        html += f"<th>{header}</th>"
-    html += "</tr>"
-    
-    # 添加数据行
-    for row in table[1:]:
-        html += "<tr>"
-        for i, cell in enumerate(row):
-            cell_style = ""
-            # 如果是接受状态，添加绿色背景
-            if i == 1 and cell == "是":
-                cell_style = " style='background-color: lightgreen;'"
-            html += f"<td{cell_style}>{cell}</td>"
-        html += "</tr>"
-    
-    html += "</table>"
-    return html
+    return ''.join(iter_html(table[0], table[1:]))
 
-def process_regex(regex):
+def process_regex(regex, page=1, reduce=False):
     """处理正则表达式并返回结果"""
     try:
         # 将正则表达式转换为NFA
         nfa = regex_to_nfa(regex)
+        report_html = ""
+        if reduce:
+            # 消除ε转移并合并等价状态，缩小转移表和图
+            nfa, report = reduce_nfa(nfa)
+            report_html = f"<p>NFA优化: {format_report(report)}</p>"
         
-        # 获取状态转移表
-        transition_table = nfa.get_transition_table()
-        table_html = render_transition_table(transition_table)
+        # 只生成当前页的状态转移表，避免大型NFA一次性渲染全部行
+        table = TransitionTable(nfa, epsilon_column=True)
+        page_count = table.page_count(PAGE_SIZE)
+        page = min(max(int(page or 1), 1), page_count)
+        table_html = ''.join(export_table(table, 'html', page, PAGE_SIZE))
+        table_html += f"<p>第 {page} / {page_count} 页，共 {len(table)} 个状态</p>"
+        table_html = report_html + table_html
         
         # 可视化NFA
         nfa_image = visualize_nfa(nfa)
@@ -392,6 +358,8 @@ with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
     gr.Markdown("输入正则表达式，查看对应的NFA及其状态转移表。")
     
     regex_input = gr.Textbox(label="正则表达式", placeholder="输入正则表达式，例如: a(b|c)*")
+    page_input = gr.Number(label="状态转移表页码", value=1, precision=0)
+    reduce_input = gr.Checkbox(label="优化NFA（消除ε转移、合并等价状态）", value=False)
     process_btn = gr.Button("转换为NFA")
     
     with gr.Row():
@@ -403,17 +371,19 @@ with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
             gr.Markdown("### NFA 状态转移表")
             transition_table = gr.HTML()
     
-    process_btn.click(
-        process_regex, 
-        inputs=[regex_input], 
+    process_event = process_btn.click(
+        async_handler(process_regex, lambda message: (None, f"<p style='color: red'>错误: {message}</p>")),
+        inputs=[regex_input, page_input, reduce_input], 
         outputs=[nfa_graph, transition_table]
     )
+    add_controls(process_event)
     
     gr.Markdown("""
     ## 使用指南
     1. 在输入框中输入正则表达式
     2. 点击"转换为NFA"按钮
     3. 查看生成的NFA图和状态转移表
+    4. 勾选"优化NFA"可以查看消除ε转移、删除无用状态并合并等价状态后的NFA
     
     ## 支持的运算符
     - `|` (或): a|b 匹配 a 或 b
@@ -429,6 +399,8 @@ with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
     - `a(b|c)*` - 匹配 'a' 后跟零个或多个 'b' 或 'c'
     """)
 
+enable_queue(iface)
+
 # 启动应用
 if __name__ == "__main__":
     iface.launch()
@@ -4,8 +4,14 @@ import io
 from PIL import Image
 import gradio as gr
 from collections import defaultdict
+from gradio_backend import async_handler, add_controls, enable_queue
+from table_export import TransitionTable, export_table
+
+PAGE_SIZE = 200  # 状态转移表每页显示的行数
 
 class State:
+    __slots__ = ('id', 'transitions', 'is_end', 'epsilon_transitions')
+
     def __init__(self, id):
         self.id = id
         self.transitions = {}  # 字符到目标状态列表的映射
@@ -247,46 +253,6 @@ def regex_to_nfa(regex):
     nfa = evaluate_postfix(postfix)
     return nfa
 
-def get_nfa_transition_table(nfa):
-    """生成NFA状态转移表"""
-    # 收集所有状态ID并按数字顺序排序
-    state_ids = sorted([state.id for state in nfa.states])
-    
-    # 收集所有符号并按字母顺序排序
-    symbols = sorted(nfa.alphabet)
-    
-    # 初始化转移表
-    transition_table = []
-    
-    # 添加表头
-    header = ["状态"] + symbols
-    transition_table.append(header)
-    
-    # 为每个状态添加一行
-    for state_id in state_ids:
-        state = next(s for s in nfa.states if s.id == state_id)
-        row = [f"q{state_id}"]
-        
-        for symbol in symbols:
-            # 获取通过该符号可达的状态
-            targets = []
-            if symbol in state.transitions:
-                targets.extend([f"q{t.id}" for t in state.transitions[symbol]])
-            
-            # 如果是ε转移，也包含在ε列中
-            if symbol == 'ε':
-                targets.extend([f"q{t.id}" for t in state.epsilon_transitions])
-            
-            # 格式化输出
-            if targets:
-                row.append(", ".join(sorted(targets)))
-            else:
-                row.append("-")
-        
-        transition_table.append(row)
-    
-    return transition_table
-
 def visualize_nfa(nfa):
     """可视化NFA"""
     dot = graphviz.Digraph(format='png')
@@ -325,42 +291,24 @@ def visualize_nfa(nfa):
     img = Image.open(buf)
     return img
 
-def process_regex_ui(regex):
+def process_regex_ui(regex, page=1):
     """处理正则表达式并返回结果"""
     try:
         nfa = regex_to_nfa(regex)
         
-        # 生成NFA状态转移表
-        transition_table = get_nfa_transition_table(nfa)
+        # 只生成当前页的状态转移表，避免大型NFA一次性渲染全部行
+        table = TransitionTable(nfa, epsilon_column=True)
+        page_count = table.page_count(PAGE_SIZE)
+        page = min(max(int(page or 1), 1), page_count)
+        table_html = ''.join(export_table(table, 'html', page, PAGE_SIZE))
+        table_html += f"<p>第 {page} / {page_count} 页，共 {len(table)} 个状态</p>"
         
         # 生成可视化
         nfa_image = visualize_nfa(nfa)
         
-        # 格式化状态转移表为字符串
-        table_str = "NFA状态转移表:\n"
-        max_col_widths = [max(len(str(row[i])) for row in transition_table) for i in range(len(transition_table[0]))]
-        
-        # 添加表头分隔线
-        separator = "+" + "+".join(["-" * (w + 2) for w in max_col_widths]) + "+"
-        table_str += separator + "\n"
-        
-        # 添加表头
-        header = "| " + " | ".join([str(transition_table[0][i]).ljust(max_col_widths[i]) 
-                                   for i in range(len(transition_table[0]))]) + " |"
-        table_str += header + "\n"
-        table_str += separator + "\n"
-        
-        # 添加数据行
-        for row in transition_table[1:]:
-            row_str = "| " + " | ".join([str(row[i]).ljust(max_col_widths[i]) 
-                                        for i in range(len(row))]) + " |"
-            table_str += row_str + "\n"
-        
-        table_str += separator
-        
-        return nfa_image, table_str
+        return nfa_image, table_html
     except Exception as e:
-        return None, f"错误: {str(e)}"
+        return None, f"<p style='color: red'>错误: {str(e)}</p>"
 
 # 创建Gradio界面
 with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
@@ -369,18 +317,19 @@ with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
     
     with gr.Row():
         regex_input = gr.Textbox(label="正则表达式", placeholder="输入正则表达式，如: a(b|c)*")
+        page_input = gr.Number(label="状态转移表页码", value=1, precision=0)
     
     process_btn = gr.Button("转换")
     
     with gr.Row():
         nfa_graph = gr.Image(label="NFA可视化")
-        nfa_table = gr.Textbox(label="NFA状态转移表", lines=15)
+        nfa_table = gr.HTML(label="NFA状态转移表")
     
     gr.Markdown("""
     ## 使用说明
     1. 在输入框中输入正则表达式
     2. 点击"转换"按钮
-    3. 查看右侧的NFA状态转移表和可视化图形
+    3. 查看右侧的NFA状态转移表和可视化图形，状态较多时修改页码查看其余的行
     
     ## 支持的运算符
     - `|` - 选择 (a|b 匹配 a 或 b)
@@ -394,11 +343,14 @@ with gr.Blocks(title="正则表达式到NFA转换工具") as iface:
     - `a|b*` - 匹配 a 或零个或多个 b
     """)
 
-    process_btn.click(
-        process_regex_ui,
-        inputs=[regex_input],
+    process_event = process_btn.click(
+        async_handler(process_regex_ui, lambda message: (None, f"<p style='color: red'>错误: {message}</p>")),
+        inputs=[regex_input, page_input],
         outputs=[nfa_graph, nfa_table]
     )
+    add_controls(process_event)
+
+enable_queue(iface)
 
 # 启动应用
 if __name__ == "__main__":
@@ -1,20 +1,69 @@
 import random
 import sys
 
-class PetriNet:
+class ViolationMonitor:
+    """
+    在线检测"主机两次接收之间没有任何主机发送数据包"的情况
+
+    维护全局发送计数，以及每个主机上一次接收时的发送计数。
+    主机再次接收时，如果发送计数没有变化，说明两次接收之间没有发送，
+    每个事件的处理时间为 O(1)。
+    """
+
     def __init__(self):
+        self.send_count = 0  # 到目前为止的发送事件数
+        self.last_receive = {}  # 主机 -> (上一次接收的步骤, 当时的发送计数)
+        self.violations = {}  # 主机 -> 该主机第一次违规的 (上一次接收步骤, 本次接收步骤)
+        self.first = None  # 最早发现的违规 (主机, 上一次接收步骤, 本次接收步骤)
+
+    def observe(self, step, event_type, host):
+        """处理一个事件，发现新的违规时返回 (主机, 上一次接收步骤, 本次接收步骤)"""
+        if event_type == "send":
+            self.send_count += 1
+            return None
+        if event_type != "receive":
+            return None
+        violation = None
+        last = self.last_receive.get(host)
+        if last is not None and last[1] == self.send_count and host not in self.violations:
+            self.violations[host] = (last[0], step)
+            violation = (host, last[0], step)
+            if self.first is None:
+                self.first = violation
+        self.last_receive[host] = (step, self.send_count)
+        return violation
+
+class PetriNet:
+    def __init__(self, event_log=None):
         self.places = {}  # 存储网络中的位置
         self.transitions = {}  # 存储转换规则
         self.tokens = {}  # 存储每个位置的标记数
         self.input_arcs = {}  # 转换的输入弧
         self.output_arcs = {}  # 转换的输出弧
+        self.arc_weights = {}  # (源, 目标) -> 弧的权重，即一次触发消耗或产生的标记数
         self.events = []  # 记录事件序列
         self.host_events = {}  # 按主机记录事件
+        self.hosts = {}  # 出现过事件的主机，按第一次出现的顺序（只用作有序集合）
+        # 事件日志（如 petri_eventlog.EventLogWriter）：设置后每次触发都写入日志，
+        # 不再在内存中累积 events 和 host_events
+        self.event_log = event_log
+        self.monitor = ViolationMonitor()  # 在线检测接收之间没有发送的情况
+        # 位置 -> 以它为输入的转换（值为 None 的 dict，当作按插入顺序排列的集合）；
+        # 用 set 时遍历顺序取决于字符串哈希，enabled 的顺序和 random.choice 的结果会随 PYTHONHASHSEED 变化
+        self.dependents = {}
+        self.enabled = []  # 当前启用的转换，random.choice 可以直接使用
+        self.enabled_index = {}  # 转换 -> 在 enabled 列表中的下标
     
     def add_place(self, place_id, tokens=0):
         """添加一个位置到Petri网"""
         self.places[place_id] = place_id
+        self.dependents.setdefault(place_id, {})
+        self.set_tokens(place_id, tokens)
+    
+    def set_tokens(self, place_id, tokens):
+        """设置位置的标记数，并更新依赖它的转换的启用状态"""
         self.tokens[place_id] = tokens
+        self._refresh(self.dependents.get(place_id, ()))
     
     def add_transition(self, transition_id, event_type=None, host=None):
         """添加一个转换到Petri网"""
@@ -25,17 +74,27 @@ class PetriNet:
         }
         self.input_arcs[transition_id] = []
         self.output_arcs[transition_id] = []
+        self._refresh((transition_id,))
     
-    def add_arc(self, source, target):
-        """添加一个弧到Petri网"""
+    def add_arc(self, source, target, weight=1):
+        """添加一个弧到Petri网，重复添加同一条弧时权重累加"""
+        if weight <= 0:
+            raise ValueError(f"弧的权重必须为正整数: {source} -> {target}")
         if source in self.places and target in self.transitions:
             # 从位置到转换的弧
-            self.input_arcs[target].append(source)
+            arcs, place = self.input_arcs[target], source
+            self.dependents[source][target] = None
         elif source in self.transitions and target in self.places:
             # 从转换到位置的弧
-            self.output_arcs[source].append(target)
+            arcs, place = self.output_arcs[source], target
         else:
             raise ValueError(f"无效的弧: {source} -> {target}")
+        key = (source, target)
+        if key not in self.arc_weights:
+            arcs.append(place)
+        self.arc_weights[key] = self.arc_weights.get(key, 0) + weight
+        if target in self.transitions:
+            self._refresh((target,))
     
     def is_enabled(self, transition_id):
         """检查转换是否启用"""
@@ -44,10 +103,28 @@ class PetriNet:
         
         # 检查所有输入位置是否有足够的标记
         for place in self.input_arcs[transition_id]:
-            if self.tokens[place] <= 0:
+            if self.tokens[place] < self.arc_weights[(place, transition_id)]:
                 return False
         return True
     
+    def _set_enabled(self, transition_id, enabled):
+        """把转换加入或移出启用列表，移除时与列表末尾交换，保持 O(1)"""
+        index = self.enabled_index.get(transition_id)
+        if enabled and index is None:
+            self.enabled_index[transition_id] = len(self.enabled)
+            self.enabled.append(transition_id)
+        elif not enabled and index is not None:
+            last = self.enabled.pop()
+            if last != transition_id:
+                self.enabled[index] = last
+                self.enabled_index[last] = index
+            del self.enabled_index[transition_id]
+    
+    def _refresh(self, transitions):
+        """重新检查指定转换的启用状态"""
+        for t in transitions:
+            self._set_enabled(t, self.is_enabled(t))
+    
     def fire_transition(self, transition_id, step):
         """触发一个转换"""
         if not self.is_enabled(transition_id):
@@ -55,62 +132,63 @@ class PetriNet:
         
         # 从输入位置移除标记
         for place in self.input_arcs[transition_id]:
-            self.tokens[place] -= 1
+            self.tokens[place] -= self.arc_weights[(place, transition_id)]
         
         # 向输出位置添加标记
         for place in self.output_arcs[transition_id]:
-            self.tokens[place] += 1
+            self.tokens[place] += self.arc_weights[(transition_id, place)]
+        
+        # 只有输入或输出位置的标记数发生了变化，只需重新检查依赖这些位置的转换
+        dependents = self.dependents
+        for place in self.input_arcs[transition_id]:
+            self._refresh(dependents[place])
+        for place in self.output_arcs[transition_id]:
+            self._refresh(dependents[place])
         
         # 记录事件
         trans_info = self.transitions[transition_id]
-        if trans_info["event_type"] and trans_info["host"]:
-            event = (step, trans_info["event_type"], trans_info["host"])
-            self.events.append(event)
-            
-            # 按主机记录事件
+        has_event = trans_info["event_type"] and trans_info["host"]
+        if self.event_log is not None:
+            self.event_log.append(step, transition_id, trans_info["event_type"] if has_event else None,
+                                  trans_info["host"] if has_event else None)
+        if has_event:
             host = trans_info["host"]
-            if host not in self.host_events:
-                self.host_events[host] = []
-            self.host_events[host].append((step, trans_info["event_type"]))
+            self.hosts.setdefault(host, None)
+            if self.event_log is None:
+                event = (step, trans_info["event_type"], host)
+                self.events.append(event)
+                
+                # 按主机记录事件
+                if host not in self.host_events:
+                    self.host_events[host] = []
+                self.host_events[host].append((step, trans_info["event_type"]))
+            self.monitor.observe(step, trans_info["event_type"], host)
         
         return True
     
     def get_enabled_transitions(self):
-        """获取所有启用的转换"""
-        return [t for t in self.transitions if self.is_enabled(t)]
+        """获取所有启用的转换（由 fire_transition 增量维护，不再逐个检查）"""
+        return list(self.enabled)
     
-    def random_step(self, step):
-        """随机选择一个启用的转换并触发它"""
-        enabled = self.get_enabled_transitions()
-        if not enabled:
+    def random_step(self, step, rng=None):
+        """随机选择一个启用的转换并触发它，rng 为 random.Random 实例，默认使用全局的 random"""
+        if not self.enabled:
             return None
         
-        transition = random.choice(enabled)
+        transition = (rng or random).choice(self.enabled)
         success = self.fire_transition(transition, step)
         return transition if success else None
     
     def check_condition(self):
-        """检查是否有一个主机在接收两个数据包之间没有任何主机发送新数据包"""
-        for host, events in self.host_events.items():
-            # 获取该主机的接收事件
-            receive_events = [(step, evt) for step, evt in events if evt == "receive"]
-            
-            if len(receive_events) < 2:
-                continue
-            
-            for i in range(1, len(receive_events)):
-                prev_step = receive_events[i-1][0]
-                curr_step = receive_events[i][0]
-                
-                # 检查这两次接收之间是否有任何发送事件
-                send_between = False
-                for step, evt_type, _ in self.events:
-                    if evt_type == "send" and prev_step < step < curr_step:
-                        send_between = True
-                        break
-                
-                if not send_between:
-                    return True, host, prev_step, curr_step
+        """
+        检查是否有一个主机在接收两个数据包之间没有任何主机发送新数据包
+
+        结果由 ViolationMonitor 在触发转换时增量维护，这里只按主机顺序取出第一个违规。
+        """
+        for host in self.hosts:
+            violation = self.monitor.violations.get(host)
+            if violation is not None:
+                return True, host, violation[0], violation[1]
         
         return False, None, None, None
 
@@ -135,28 +213,32 @@ def parse_input():
             trans_id = parts[0]
             petri_net.add_transition(trans_id)
     
-    # 读取弧
+    # 读取弧，第三列为可选的权重
     n_arcs = int(input())
     for _ in range(n_arcs):
-        source, target = input().split()
-        petri_net.add_arc(source, target)
+        parts = input().split()
+        if len(parts) == 3:
+            petri_net.add_arc(parts[0], parts[1], int(parts[2]))
+        else:
+            petri_net.add_arc(parts[0], parts[1])
     
     return petri_net
 
-def simulate(petri_net, max_steps=1000):
-    """模拟Petri网的运行"""
+def simulate(petri_net, max_steps=1000, rng=None):
+    """模拟Petri网的运行，传入 rng（random.Random）时结果可以复现"""
     print("开始模拟...")
     
     step = 0
     while step < max_steps:
-        transition = petri_net.random_step(step)
+        transition = petri_net.random_step(step, rng)
         if transition is None:
             print(f"在步骤 {step} 没有可启用的转换，模拟停止。")
             break
         
-        # 检查条件
-        condition_met, host, step1, step2 = petri_net.check_condition()
-        if condition_met:
+        # 检查条件（监视器在触发转换时已经完成检测）
+        violation = petri_net.monitor.first
+        if violation is not None:
+            host, step1, step2 = violation
             print(f"\n发现满足条件的情况!")
             print(f"主机 {host} 在步骤 {step1} 和 {step2} 接收了数据包，")
             print(f"但在这两次接收之间没有任何主机发送新的数据包。")
@@ -0,0 +1,138 @@
+from graphviz_vv import regex_to_nfa
+from nfa_reduce import remove_epsilon, prune, merge_bisimilar
+
+
+class ApproxMatcher:
+    """
+    近似（编辑距离）正则匹配
+
+    在消除ε转移后的NFA与Levenshtein自动机的乘积上运行：配置是 {NFA状态: 最小代价}，
+    只保留代价不超过 k 的状态。读入一个字符时
+        匹配   沿同一符号的边前进，代价不变
+        替换   沿其他符号的边前进，代价加一
+        插入   输入中多出的字符，停在原状态，代价加一
+        删除   模式中缺少的字符，不读输入沿任意边前进，代价加一
+    配置的个数只与NFA大小和 k 有关，因此对固定的 k 匹配时间与输入长度成线性关系。
+    配置之间的转移按需缓存，相当于惰性构建的确定化Levenshtein自动机。
+    """
+
+    def __init__(self, regex, k):
+        if k < 0:
+            raise ValueError("最大编辑距离不能为负数")
+        self.regex = regex
+        self.k = k
+        nfa = regex_to_nfa(regex)
+        start, accepting, edges = remove_epsilon(nfa)
+        n_states, self.start, self.accepting, edges = merge_bisimilar(
+            *prune(len(nfa.states), start, accepting, edges))
+        self.alphabet = {symbol for _, symbol, _ in edges}
+        self.outgoing = [[] for _ in range(n_states)]
+        for from_id, symbol, to_id in sorted(edges):
+            self.outgoing[from_id].append((symbol, to_id))
+        self._cache = {}  # (配置, 符号) -> 下一个配置
+        self.initial = self._freeze(self._delete({self.start: 0}))
+
+    @staticmethod
+    def _freeze(costs):
+        """把配置转换为可哈希的形式，相同的配置只有一种表示"""
+        return tuple(sorted(costs.items()))
+
+    def _delete(self, costs):
+        """删除操作的闭包：按代价从小到大，不读输入沿边前进"""
+        k = self.k
+        for cost in range(k):
+            for state in [s for s, c in costs.items() if c == cost]:
+                for _, target in self.outgoing[state]:
+                    if costs.get(target, k + 1) > cost + 1:
+                        costs[target] = cost + 1
+        return costs
+
+    def step(self, config, char):
+        """配置读入一个字符后的配置，字母表之外的字符共用同一个缓存项"""
+        symbol = char if char in self.alphabet else None
+        key = (config, symbol)
+        result = self._cache.get(key)
+        if result is None:
+            k = self.k
+            costs = {}
+            for state, cost in config:
+                if cost < k and costs.get(state, k + 1) > cost + 1:
+                    costs[state] = cost + 1
+                for edge_symbol, target in self.outgoing[state]:
+                    new_cost = cost if edge_symbol == symbol else cost + 1
+                    if new_cost <= k and costs.get(target, k + 1) > new_cost:
+                        costs[target] = new_cost
+            result = self._freeze(self._delete(costs))
+            self._cache[key] = result
+        return result
+
+    def distance(self, config):
+        """配置中接受状态的最小代价，没有接受状态时返回 None"""
+        costs = [cost for state, cost in config if state in self.accepting]
+        return min(costs) if costs else None
+
+    def match(self, text):
+        """
+        整个字符串与正则表达式的近似匹配
+
+        返回:
+            最小编辑距离（不超过 k），超过 k 时返回 None
+        """
+        config = self.initial
+        for char in text:
+            config = self.step(config, char)
+            if not config:
+                return None
+        return self.distance(config)
+
+    def search(self, text):
+        """
+        在字符串中查找与正则表达式近似匹配的子串
+
+        每个位置都可以以代价 0 开始新的匹配。
+        返回:
+            (最小编辑距离, 匹配结束位置)，结束位置取最小距离第一次出现的位置；
+            找不到距离不超过 k 的子串时返回 None
+        """
+        best = None
+        restart = dict(self.initial)
+        config = self.initial
+        for position in range(len(text) + 1):
+            if position > 0:
+                config = self.step(config, text[position - 1])
+                # 合并从当前位置开始的新匹配
+                costs = dict(config)
+                for state, cost in restart.items():
+                    if costs.get(state, self.k + 1) > cost:
+                        costs[state] = cost
+                config = self._freeze(costs)
+            distance = self.distance(config)
+            if distance is not None and (best is None or distance < best[0]):
+                best = (distance, position)
+                if distance == 0:
+                    break
+        return best
+
+
+def approx_match(regex, text, k):
+    """判断字符串是否在 k 次编辑之内匹配正则表达式，返回最小编辑距离或 None"""
+    return ApproxMatcher(regex, k).match(text)
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    k = int(input("请输入最大编辑距离: "))
+    text = input("请输入要匹配的字符串: ")
+    matcher = ApproxMatcher(regex, k)
+    distance = matcher.match(text)
+    if distance is None:
+        print(f"整个字符串与表达式的编辑距离超过 {k}")
+    else:
+        print(f"整个字符串与表达式的编辑距离为 {distance}")
+    found = matcher.search(text)
+    if found is not None:
+        print(f"最接近的子串在位置 {found[1]} 结束，编辑距离为 {found[0]}")
+
+
+if __name__ == "__main__":
+    main()
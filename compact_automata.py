@@ -0,0 +1,293 @@
+import json
+import struct
+from array import array
+from bisect import bisect_left
+
+EPSILON_ID = 0  # 符号ID 0 固定表示 ε
+
+_HEADER = struct.Struct('<4sqqqq')  # 魔数, 状态数, 转移数, 开始状态, 符号表字节数
+
+
+class StateView:
+    """
+    紧凑自动机中单个状态的轻量视图，接口与 State 对象保持一致
+
+    视图本身只保存自动机引用和状态ID，转移在访问时才从数组中还原。
+    """
+
+    __slots__ = ('automaton', 'id')
+
+    def __init__(self, automaton, state_id):
+        self.automaton = automaton
+        self.id = state_id
+
+    @property
+    def is_end(self):
+        return bool(self.automaton.accepting[self.id])
+
+    @property
+    def transitions(self):
+        """符号 -> [目标状态视图]，与 State.transitions 的格式相同"""
+        result = {}
+        for symbol, target in self.automaton.edges(self.id):
+            result.setdefault(symbol, []).append(self.automaton.state(target))
+        return result
+
+    @property
+    def epsilon_transitions(self):
+        return [self.automaton.state(target)
+                for symbol, target in self.automaton.edges(self.id) if symbol == 'ε']
+
+    def __eq__(self, other):
+        return (isinstance(other, StateView) and
+                other.automaton is self.automaton and other.id == self.id)
+
+    def __hash__(self):
+        return hash((id(self.automaton), self.id))
+
+    def __repr__(self):
+        return f"StateView({self.id})"
+
+
+class CompactAutomaton:
+    """
+    结构数组（struct-of-arrays）形式的自动机
+
+    所有状态的出边按状态顺序连续存放（CSR 格式）：
+        offsets[i] .. offsets[i+1] 是状态 i 的出边在 targets/symbols 中的范围
+        targets   出边的目标状态ID
+        symbols   出边的符号ID，符号本身保存在 symbol_table 中
+        accepting 每个状态是否为接受状态（每个状态一个字节）
+    每个状态只占几个机器字，复制和序列化就是复制几个连续数组。
+    """
+
+    __slots__ = ('offsets', 'targets', 'symbols', 'accepting', 'start', 'symbol_table', '_symbol_ids')
+
+    def __init__(self):
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        self.symbols = array('l')
+        self.accepting = bytearray()
+        self.start = 0
+        self.symbol_table = ['ε']
+        self._symbol_ids = {'ε': EPSILON_ID}
+
+    def symbol_id(self, symbol):
+        """获取符号ID，新符号会追加到符号表末尾"""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbol_table)
+            self.symbol_table.append(symbol)
+            self._symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def add_state(self, edges, is_end=False):
+        """
+        按顺序追加一个状态及其全部出边
+
+        参数:
+            edges: 可迭代的 (符号, 目标状态ID) 序列
+            is_end: 是否为接受状态
+
+        返回:
+            新状态的ID
+        """
+        for symbol, target in edges:
+            self.symbols.append(self.symbol_id(symbol))
+            self.targets.append(target)
+        self.offsets.append(len(self.targets))
+        self.accepting.append(1 if is_end else 0)
+        return len(self.accepting) - 1
+
+    def __len__(self):
+        return len(self.accepting)
+
+    @property
+    def alphabet(self):
+        return set(self.symbol_table[1:])
+
+    def edges(self, state_id):
+        """遍历状态的出边，产出 (符号, 目标状态ID)"""
+        symbol_table = self.symbol_table
+        for i in range(self.offsets[state_id], self.offsets[state_id + 1]):
+            yield symbol_table[self.symbols[i]], self.targets[i]
+
+    def state(self, state_id):
+        """返回状态的视图对象"""
+        return StateView(self, state_id)
+
+    @property
+    def states(self):
+        return [StateView(self, i) for i in range(len(self))]
+
+    @property
+    def start_state(self):
+        return StateView(self, self.start)
+
+    @property
+    def end_states(self):
+        return [StateView(self, i) for i, flag in enumerate(self.accepting) if flag]
+
+    def nbytes(self):
+        """数组部分占用的字节数（不含符号表）"""
+        return (self.offsets.itemsize * len(self.offsets) +
+                self.targets.itemsize * len(self.targets) +
+                self.symbols.itemsize * len(self.symbols) +
+                len(self.accepting))
+
+    def copy(self):
+        """复制自动机：只需复制几个连续数组"""
+        other = type(self)()
+        other.offsets = array('l', self.offsets)
+        other.targets = array('l', self.targets)
+        other.symbols = array('l', self.symbols)
+        other.accepting = bytearray(self.accepting)
+        other.start = self.start
+        other.symbol_table = list(self.symbol_table)
+        other._symbol_ids = dict(self._symbol_ids)
+        return other
+
+    def to_bytes(self):
+        """序列化为字节串：固定头部 + 各列原始数据 + JSON 符号表"""
+        table = json.dumps(self.symbol_table, ensure_ascii=False).encode('utf-8')
+        targets = array('q', self.targets)
+        header = _HEADER.pack(b'CAUT', len(self), len(targets), self.start, len(table))
+        return b''.join([
+            header,
+            array('q', self.offsets).tobytes(),
+            targets.tobytes(),
+            array('q', self.symbols).tobytes(),
+            bytes(self.accepting),
+            table,
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """从 to_bytes 的结果还原自动机"""
+        magic, n_states, n_edges, start, table_size = _HEADER.unpack_from(data, 0)
+        if magic != b'CAUT':
+            raise ValueError("无效的自动机数据")
+        view = memoryview(data)[_HEADER.size:]
+        automaton = cls()
+        sizes = [(n_states + 1) * 8, n_edges * 8, n_edges * 8]
+        columns = []
+        for size in sizes:
+            column = array('q')
+            column.frombytes(view[:size])
+            columns.append(array('l', column))
+            view = view[size:]
+        automaton.offsets, automaton.targets, automaton.symbols = columns
+        automaton.accepting = bytearray(view[:n_states])
+        automaton.symbol_table = json.loads(bytes(view[n_states:n_states + table_size]).decode('utf-8'))
+        automaton._symbol_ids = {symbol: i for i, symbol in enumerate(automaton.symbol_table)}
+        automaton.start = start
+        return automaton
+
+
+class CompactNFA(CompactAutomaton):
+    """紧凑形式的NFA，ε转移与普通转移存放在同一组数组中"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_nfa(cls, nfa):
+        """
+        从 State 对象构成的NFA（NFA.py、NFA2.py 或 graphviz_vv.py）转换
+
+        转换时按 nfa.states 的顺序重新编号，不要求原状态ID连续。
+        """
+        compact = cls()
+        index = {id(state): i for i, state in enumerate(nfa.states)}
+        for state in nfa.states:
+            edges = [(symbol, index[id(target)])
+                     for symbol, targets in state.transitions.items()
+                     for target in targets]
+            compact.add_state(edges, state.is_end)
+        compact.start = index[id(nfa.start_state)]
+        return compact
+
+    def epsilon_closure(self, state_ids):
+        """计算状态ID集合的ε闭包"""
+        offsets, targets, symbols = self.offsets, self.targets, self.symbols
+        closure = set(state_ids)
+        stack = list(state_ids)
+        while stack:
+            state_id = stack.pop()
+            for i in range(offsets[state_id], offsets[state_id + 1]):
+                if symbols[i] == EPSILON_ID and targets[i] not in closure:
+                    closure.add(targets[i])
+                    stack.append(targets[i])
+        return closure
+
+    def move(self, state_ids, symbol):
+        """计算状态ID集合通过某个符号的转移"""
+        symbol_id = self._symbol_ids.get(symbol)
+        result = set()
+        if symbol_id is None or symbol_id == EPSILON_ID:
+            return result
+        offsets, targets, symbols = self.offsets, self.targets, self.symbols
+        for state_id in state_ids:
+            for i in range(offsets[state_id], offsets[state_id + 1]):
+                if symbols[i] == symbol_id:
+                    result.add(targets[i])
+        return result
+
+    def accepts(self, text):
+        """模拟NFA判断字符串是否被接受"""
+        current = self.epsilon_closure({self.start})
+        for char in text:
+            current = self.epsilon_closure(self.move(current, char))
+            if not current:
+                return False
+        return any(self.accepting[state_id] for state_id in current)
+
+
+class CompactDFA(CompactAutomaton):
+    """紧凑形式的DFA，每个状态的出边按符号ID排序，查找转移用二分查找"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dfa(cls, dfa):
+        """从 graphviz_vv.DFA（转移保存在 (状态ID, 符号) -> 目标ID 字典中）转换"""
+        compact = cls()
+        index = {state.id: i for i, state in enumerate(dfa.states)}
+        # 先为所有符号分配ID，使每行可以按符号ID排序
+        for symbol in sorted(dfa.alphabet):
+            compact.symbol_id(symbol)
+        rows = [[] for _ in dfa.states]
+        for (from_id, symbol), to_id in dfa.transitions.items():
+            rows[index[from_id]].append((compact.symbol_id(symbol), index[to_id]))
+        ends = set(state.id for state in dfa.end_states)
+        for state, row in zip(dfa.states, rows):
+            row.sort()
+            compact.add_state(((compact.symbol_table[s], t) for s, t in row), state.id in ends)
+        compact.start = index[dfa.start_state.id]
+        return compact
+
+    @property
+    def transitions(self):
+        """还原为 graphviz_vv.DFA 的 (状态ID, 符号) -> 目标ID 字典"""
+        return {(state_id, symbol): target
+                for state_id in range(len(self))
+                for symbol, target in self.edges(state_id)}
+
+    def step(self, state_id, symbol):
+        """计算转移目标，不存在时返回 -1"""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return -1
+        lo, hi = self.offsets[state_id], self.offsets[state_id + 1]
+        i = bisect_left(self.symbols, symbol_id, lo, hi)
+        if i < hi and self.symbols[i] == symbol_id:
+            return self.targets[i]
+        return -1
+
+    def accepts(self, text):
+        """判断字符串是否被接受"""
+        state_id = self.start
+        for char in text:
+            state_id = self.step(state_id, char)
+            if state_id < 0:
+                return False
+        return bool(self.accepting[state_id])
@@ -0,0 +1,231 @@
+from lazy_dfa import LazyDFA
+from pike_vm import parse_regex
+
+# ε转移上的计数器动作
+INIT, INCR, EXIT = range(3)
+
+
+class CountedNFA:
+    """
+    带计数器的NFA（counter-augmented NFA）
+
+    计数重复 x{m,n} 的子自动机只构建一份，额外用一个计数器记录当前是第几次重复：
+        进入子自动机时 INIT 把计数器置为 1
+        子自动机结束后 INCR 在计数器小于上限时回到子自动机开头并加一
+        子自动机结束后 EXIT 在计数器不小于下限时离开，并把计数器清零
+    因此NFA的大小与重复上下限无关。运行时的配置是 (状态, 计数器取值元组)，
+    不在重复内部的计数器恒为 0，保证相同的配置只有一种表示。
+    """
+
+    def __init__(self):
+        self.char_edges = []   # 状态 -> [(符号, 目标状态)]
+        self.eps_edges = []    # 状态 -> [(目标状态, 动作或None, 计数器编号)]
+        self.counters = []     # 计数器编号 -> (下限, 上限或None)
+        self.alphabet = set()
+        self.start = None
+        self.end = None
+
+    def new_state(self):
+        self.char_edges.append([])
+        self.eps_edges.append([])
+        return len(self.char_edges) - 1
+
+    def add_char(self, from_state, symbol, to_state):
+        self.alphabet.add(symbol)
+        self.char_edges[from_state].append((symbol, to_state))
+
+    def add_epsilon(self, from_state, to_state, action=None, counter=None):
+        self.eps_edges[from_state].append((to_state, action, counter))
+
+    def __len__(self):
+        return len(self.char_edges)
+
+    @classmethod
+    def from_regex(cls, regex):
+        """根据正则表达式构建带计数器的NFA（文法同 pike_vm.parse_regex）"""
+        cnfa = cls()
+        tree, _ = parse_regex(regex)
+        cnfa.start, cnfa.end = cnfa._build(tree)
+        return cnfa
+
+    def _build(self, node):
+        """Thompson构造，返回片段的 (开始状态, 结束状态)"""
+        kind = node[0]
+        start = self.new_state()
+        if kind == 'char':
+            end = self.new_state()
+            self.add_char(start, node[1], end)
+            return start, end
+        if kind == 'empty':
+            end = self.new_state()
+            self.add_epsilon(start, end)
+            return start, end
+        if kind == 'group':
+            inner_start, inner_end = self._build(node[2])
+            self.add_epsilon(start, inner_start)
+            return start, inner_end
+        if kind == 'cat':
+            current = start
+            for item in node[1]:
+                item_start, item_end = self._build(item)
+                self.add_epsilon(current, item_start)
+                current = item_end
+            return start, current
+        if kind == 'alt':
+            end = self.new_state()
+            for branch in node[1:]:
+                branch_start, branch_end = self._build(branch)
+                self.add_epsilon(start, branch_start)
+                self.add_epsilon(branch_end, end)
+            return start, end
+
+        end = self.new_state()
+        if kind == 'repeat' and node[3] == 0:
+            # x{0,0} 只匹配空串
+            self.add_epsilon(start, end)
+            return start, end
+        body_start, body_end = self._build(node[1])
+        if kind in ('star', 'opt') or (kind == 'repeat' and node[2] == 0):
+            self.add_epsilon(start, end)  # 允许跳过
+        if kind == 'repeat':
+            counter = len(self.counters)
+            self.counters.append((node[2], node[3]))
+            self.add_epsilon(start, body_start, INIT, counter)
+            self.add_epsilon(body_end, body_start, INCR, counter)
+            self.add_epsilon(body_end, end, EXIT, counter)
+            return start, end
+        self.add_epsilon(start, body_start)
+        if kind in ('star', 'plus'):
+            self.add_epsilon(body_end, body_start)  # 循环
+        self.add_epsilon(body_end, end)
+        return start, end
+
+    def _apply(self, action, counter, values):
+        """执行ε转移上的计数器动作，不满足条件时返回 None"""
+        if action is None:
+            return values
+        low, high = self.counters[counter]
+        value = values[counter]
+        if action == INIT:
+            value = 1
+        elif action == INCR:
+            if high is not None and value >= high:
+                return None
+            # 没有上限时，超过下限的次数没有区别，饱和在下限处保证配置有限
+            value = value + 1 if high is not None else min(value + 1, max(low, 1))
+        else:
+            if value < low:
+                return None
+            value = 0
+        return values[:counter] + (value,) + values[counter + 1:]
+
+    def closure(self, configs):
+        """计算配置集合在ε转移（含计数器动作）下的闭包"""
+        result = set(configs)
+        stack = list(configs)
+        while stack:
+            state, values = stack.pop()
+            for target, action, counter in self.eps_edges[state]:
+                new_values = self._apply(action, counter, values)
+                if new_values is None:
+                    continue
+                config = (target, new_values)
+                if config not in result:
+                    result.add(config)
+                    stack.append(config)
+        return frozenset(result)
+
+    def initial(self):
+        """起始配置集合"""
+        return self.closure({(self.start, (0,) * len(self.counters))})
+
+    def move(self, configs, symbol):
+        """配置集合读入一个符号后的配置集合（未做ε闭包）"""
+        result = set()
+        for state, values in configs:
+            for edge_symbol, target in self.char_edges[state]:
+                if edge_symbol == symbol:
+                    result.add((target, values))
+        return result
+
+    def is_accepting(self, configs):
+        return any(state == self.end for state, _ in configs)
+
+    def accepts(self, text):
+        """直接模拟NFA判断字符串是否被接受，不缓存DFA状态"""
+        configs = self.initial()
+        for char in text:
+            configs = self.closure(self.move(configs, char))
+            if not configs:
+                return False
+        return self.is_accepting(configs)
+
+
+class CountedLazyDFA(LazyDFA):
+    """
+    在带计数器的NFA上惰性构建的DFA
+
+    DFA状态是配置集合，只有实际访问到的计数组合才会被物化，
+    可以直接用于 dfa_equiv 和 dfa_product。
+    """
+
+    @classmethod
+    def from_regex(cls, regex):
+        return cls(CountedNFA.from_regex(regex))
+
+    def _initial_set(self):
+        return self.nfa.initial()
+
+    def _successor(self, states, symbol):
+        return self.nfa.closure(self.nfa.move(states, symbol))
+
+    def _accepting_set(self, states):
+        return self.nfa.is_accepting(states)
+
+
+# 回归检查：(正则表达式, 字符串, 是否应当完全匹配)，后缀运算符与 {m,n} 连用时各引擎必须一致
+REGRESSION_CASES = [
+    ('a*{2}', '', True),
+    ('a*{2}', 'a', True),
+    ('a*{2}', 'aaa', True),
+    ('a+{2}', 'a', False),
+    ('a+{2}', 'aa', True),
+    ('a+{2}', 'aaa', True),
+    ('a?{2}', '', True),
+    ('a?{2}', 'a', True),
+    ('a?{2}', 'aaa', False),
+    ('a{2}*', 'aaa', False),
+    ('a{2}*', 'aaaa', True),
+    ('(ab){2,3}c', 'ababc', True),
+    ('(ab){2,3}c', 'abc', False),
+    ('a{1,1000}', 'a' * 10, True),
+    ('a{3,}', 'aa', False),
+    ('a{3,}', 'a' * 50, True),
+]
+
+
+def check_engines(cases=REGRESSION_CASES):
+    """用 graphviz_vv.match_regex、LazyDFA、CountedNFA 和 PikeVM 分别匹配，返回结果不符的用例"""
+    from graphviz_vv import match_regex
+    from lazy_dfa import LazyDFA
+    from pike_vm import PikeVM
+
+    failures = []
+    for regex, text, expected in cases:
+        results = {
+            'match_regex': match_regex(regex, text),
+            'LazyDFA': LazyDFA.from_regex(regex).accepts(text),
+            'CountedNFA': CountedNFA.from_regex(regex).accepts(text),
+            'PikeVM': PikeVM(regex).fullmatch(text) is not None,
+        }
+        for engine, result in results.items():
+            if result != expected:
+                failures.append((engine, regex, text, expected, result))
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_engines()
+    for engine, regex, text, expected, result in failures:
+        print(f"{engine}: '{regex}' 匹配 '{text}' 应为 {expected}，实际为 {result}")
+    print("全部通过" if not failures else f"{len(failures)} 个用例失败")
@@ -0,0 +1,171 @@
+import time
+
+from graphviz_vv import regex_to_nfa, nfa_to_dfa, minimize_dfa, match_dfa
+
+
+def _outgoing(min_dfa):
+    """整理出 状态ID -> {符号: 目标状态ID}"""
+    outgoing = {state.id: {} for state in min_dfa.states}
+    for (from_id, symbol), to_id in min_dfa.transitions.items():
+        outgoing[from_id][symbol] = to_id
+    return outgoing
+
+
+def _literal_run(state_id, outgoing, accepting):
+    """
+    从状态出发沿"唯一出边、非接受状态"的链收集一段字面量
+
+    链上的每个状态只能读一个确定的字符，且输入在链中间结束一定不匹配，
+    所以整段可以用一次 str.startswith 判断。返回 (字面量, 链尾状态ID)。
+    """
+    literal = []
+    current = state_id
+    seen = set()
+    while (current not in accepting and current not in seen
+           and len(outgoing[current]) == 1):
+        seen.add(current)
+        (symbol, target), = outgoing[current].items()
+        literal.append(symbol)
+        current = target
+    return ''.join(literal), current
+
+
+def generate_source(min_dfa, name='_match'):
+    """
+    将最小化DFA展开为专用的Python匹配函数源码
+
+    每个状态生成一段代码，状态编号保存在局部变量中：
+      - 字面量链用 str.startswith 一次比较多个字符
+      - 自环用 while 循环连续跳过，不回到分发逻辑
+      - 没有出边的状态直接返回，读入未知字符立即返回 False
+    """
+    outgoing = _outgoing(min_dfa)
+    accepting = set(state.id for state in min_dfa.end_states)
+    start = min_dfa.start_state.id
+    # 起始状态放在最前面，其余按编号排列
+    order = [start] + sorted(state_id for state_id in outgoing if state_id != start)
+
+    lines = [
+        f"def {name}(s):",
+        "    n = len(s)",
+        "    i = 0",
+        f"    state = {start}",
+        "    while True:",
+    ]
+    for index, state_id in enumerate(order):
+        keyword = "if" if index == 0 else "elif"
+        lines.append(f"        {keyword} state == {state_id}:")
+        body = []
+        is_end = state_id in accepting
+        edges = outgoing[state_id]
+
+        literal, run_end = _literal_run(state_id, outgoing, accepting)
+        if len(literal) >= 2:
+            body.append(f"if not s.startswith({literal!r}, i):")
+            body.append("    return False")
+            body.append(f"i += {len(literal)}")
+            body.append(f"state = {run_end}")
+            body.append("continue")
+        elif not edges:
+            body.append(f"return i == n" if is_end else "return False")
+        else:
+            loop_chars = ''.join(sorted(s for s, t in edges.items() if t == state_id))
+            if loop_chars:
+                test = f"s[i] == {loop_chars!r}" if len(loop_chars) == 1 else f"s[i] in {loop_chars!r}"
+                body.append(f"while i < n and {test}:")
+                body.append("    i += 1")
+            body.append("if i == n:")
+            body.append(f"    return {is_end}")
+            body.append("c = s[i]")
+            body.append("i += 1")
+
+            # 按目标状态分组，同一目标的多个字符合并成一次 in 判断
+            groups = {}
+            for symbol, target in sorted(edges.items()):
+                if target != state_id:
+                    groups.setdefault(target, []).append(symbol)
+            branch = "if"
+            for target, symbols in groups.items():
+                chars = ''.join(symbols)
+                test = f"c == {chars!r}" if len(chars) == 1 else f"c in {chars!r}"
+                body.append(f"{branch} {test}:")
+                body.append(f"    state = {target}")
+                branch = "elif"
+            if groups:
+                body.append("else:")
+                body.append("    return False")
+            else:
+                body.append("return False")
+        lines.extend("            " + line for line in body)
+    lines.append("        else:")
+    lines.append("            return False")
+    return "\n".join(lines) + "\n"
+
+
+class CompiledPattern:
+    """正则表达式编译结果：最小化DFA、生成的源码以及编译好的匹配函数"""
+
+    def __init__(self, regex):
+        self.regex = regex
+        self.min_dfa = minimize_dfa(nfa_to_dfa(regex_to_nfa(regex)))
+        self.source = generate_source(self.min_dfa)
+        namespace = {}
+        exec(compile(self.source, f"<dfa_codegen {regex!r}>", "exec"), namespace)
+        self.match = namespace['_match']
+
+    def match_table(self, input_string):
+        """使用通用的查表引擎匹配，用于对比"""
+        return match_dfa(self.min_dfa, input_string)
+
+
+_cache = {}
+
+
+def compile_matcher(regex):
+    """编译正则表达式为专用匹配函数，结果按正则表达式缓存"""
+    pattern = _cache.get(regex)
+    if pattern is None:
+        pattern = CompiledPattern(regex)
+        _cache[regex] = pattern
+    return pattern
+
+
+def benchmark(regex, inputs, repeat=5):
+    """
+    比较生成代码与查表引擎的匹配耗时
+
+    返回:
+        {'codegen': 秒, 'table': 秒, 'speedup': 倍数}，耗时取 repeat 次中的最小值
+    """
+    pattern = compile_matcher(regex)
+    for text in inputs:
+        if pattern.match(text) != pattern.match_table(text):
+            raise AssertionError(f"生成代码与查表引擎结果不一致: {text!r}")
+
+    def best(func):
+        times = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            for text in inputs:
+                func(text)
+            times.append(time.perf_counter() - begin)
+        return min(times)
+
+    codegen_time = best(pattern.match)
+    table_time = best(pattern.match_table)
+    return {'codegen': codegen_time, 'table': table_time, 'speedup': table_time / codegen_time}
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    pattern = compile_matcher(regex)
+    print("生成的匹配函数:")
+    print(pattern.source)
+    text = input("请输入用于基准测试的字符串: ")
+    result = benchmark(regex, [text] * 1000)
+    print(f"生成代码: {result['codegen']:.6f}s, 查表引擎: {result['table']:.6f}s, "
+          f"加速 {result['speedup']:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
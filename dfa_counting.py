@@ -0,0 +1,163 @@
+import numpy as np
+
+from graphviz_vv import regex_to_nfa, nfa_to_dfa, minimize_dfa
+
+
+class LanguageCounter:
+    """
+    在最小化DFA上统计和均匀采样给定长度的字符串
+
+    DFA被展开为稠密转移矩阵 delta[状态, 符号]，缺少的转移指向额外的死状态。
+    计数使用精确的 Python 大整数；采样使用逐步归一化的浮点计数表，
+    因此 n 达到数千时也不会溢出。
+    """
+
+    def __init__(self, regex):
+        min_dfa = minimize_dfa(nfa_to_dfa(regex_to_nfa(regex)))
+        self.alphabet = sorted(s for s in min_dfa.alphabet if s != 'ε')
+        index = {state.id: i for i, state in enumerate(min_dfa.states)}
+        symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        self.n_states = len(min_dfa.states)
+        self.dead = self.n_states
+
+        self.delta = np.full((self.n_states + 1, len(self.alphabet)), self.dead, dtype=np.int64)
+        for (from_id, symbol), to_id in min_dfa.transitions.items():
+            if symbol in symbol_index:
+                self.delta[index[from_id], symbol_index[symbol]] = index[to_id]
+        self.accept = np.zeros(self.n_states + 1, dtype=np.int64)
+        for state in min_dfa.end_states:
+            self.accept[index[state.id]] = 1
+        self.start = index[min_dfa.start_state.id]
+
+        # 状态间的转移计数矩阵：step[s, t] = 从 s 一步到达 t 的符号个数（不含死状态）
+        self.step = np.zeros((self.n_states, self.n_states), dtype=np.int64)
+        for s in range(self.n_states):
+            for t in self.delta[s]:
+                if t != self.dead:
+                    self.step[s, t] += 1
+        self._weight_table = None
+
+    def count(self, n):
+        """
+        精确计算长度为 n 的被接受字符串个数
+
+        n 较小时逐步做动态规划，n 相对状态数较大时改用矩阵快速幂，
+        两者都在 object 数组上用 Python 大整数运算，结果不会溢出。
+        """
+        if n < 0:
+            raise ValueError("长度不能为负数")
+        step = self.step.astype(object)
+        vector = self.accept[:self.n_states].astype(object)
+        if n <= self.n_states * max(n.bit_length(), 1):
+            for _ in range(n):
+                vector = step.dot(vector)
+            return int(vector[self.start])
+
+        # 矩阵快速幂：result = step^n
+        result = np.identity(self.n_states, dtype=np.int64).astype(object)
+        base = step
+        while n:
+            if n & 1:
+                result = result.dot(base)
+            base = base.dot(base)
+            n >>= 1
+        return int(result[self.start].dot(vector))
+
+    def _weights(self, n):
+        """
+        计算采样用的归一化计数表
+
+        weights[r, s] 与"从状态 s 出发、再读 r 个符号后被接受的字符串数"成比例，
+        每一行单独缩放到最大值为1；采样时只用到同一行内的比值，所以缩放不影响分布。
+        最后一列是死状态，权重恒为0。
+        """
+        # 长度为 n 的表同时包含所有更短的长度，可以直接截取
+        if self._weight_table is not None and len(self._weight_table) > n:
+            return self._weight_table[:n + 1]
+        weights = np.zeros((n + 1, self.n_states + 1), dtype=np.float64)
+        weights[0, :self.n_states] = self.accept[:self.n_states]
+        step = self.step.astype(np.float64)
+        for r in range(1, n + 1):
+            row = step @ weights[r - 1, :self.n_states]
+            peak = row.max()
+            weights[r, :self.n_states] = row / peak if peak > 0 else row
+        self._weight_table = weights
+        return weights
+
+    def sample_indices(self, n, k, seed=None):
+        """
+        从长度为 n 的被接受字符串中均匀、独立地抽取 k 个
+
+        返回:
+            形状为 (k, n) 的符号下标矩阵，符号为 self.alphabet[下标]
+        """
+        if not self.count_nonzero(n):
+            raise ValueError(f"没有长度为 {n} 的字符串被接受")
+        rng = np.random.default_rng(seed)
+        weights = self._weights(n)
+        n_symbols = len(self.alphabet)
+        result = np.empty((k, n), dtype=np.int32)
+        states = np.full(k, self.start, dtype=np.int64)
+        offsets = np.arange(self.n_states + 1, dtype=np.float64)[:, None]
+
+        for i in range(n):
+            remaining = n - i - 1
+            # 每个状态下各符号的权重 = 读入该符号后剩余长度内可接受的字符串数
+            symbol_weights = weights[remaining][self.delta]
+            totals = symbol_weights.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1
+            # 把每个状态的累积分布平移到 [s, s+1) 区间后展平，
+            # 一次 searchsorted 即可同时为所有样本按各自的状态选择符号
+            cumulative = (offsets + np.cumsum(symbol_weights, axis=1) / totals).ravel()
+            # 舍入误差可能让随机数越过本行末尾，此时取该状态最后一个权重非零的符号
+            last_positive = n_symbols - 1 - np.argmax(symbol_weights[:, ::-1] > 0, axis=1)
+            targets = states + rng.random(k)
+            flat = np.searchsorted(cumulative, targets, side='right')
+            symbols = np.minimum(flat - states * n_symbols, last_positive[states])
+            result[:, i] = symbols
+            states = self.delta[states, symbols]
+        return result
+
+    def count_nonzero(self, n):
+        """判断是否存在长度为 n 的被接受字符串（只用浮点表，不做大整数运算）"""
+        return bool(self._weights(n)[n, self.start] > 0)
+
+    def sample(self, n, k, seed=None):
+        """从长度为 n 的被接受字符串中均匀抽取 k 个，返回字符串列表"""
+        indices = self.sample_indices(n, k, seed)
+        if n == 0:
+            return [''] * k
+        chars = np.array(self.alphabet, dtype='U1')[indices]
+        # (k, n) 的单字符数组可以直接视为 k 个长度为 n 的字符串
+        return chars.view(f'U{n}').ravel().tolist()
+
+    def iter_samples(self, n, k, batch_size=100000, seed=None):
+        """分批生成样本，适合 k 达到数百万时控制内存"""
+        seeds = np.random.SeedSequence(seed).spawn(-(-k // batch_size))
+        for batch, batch_seed in enumerate(seeds):
+            size = min(batch_size, k - batch * batch_size)
+            yield from self.sample(n, size, batch_seed)
+
+
+def count(regex, n):
+    """长度为 n 的、被正则表达式完全匹配的字符串个数"""
+    return LanguageCounter(regex).count(n)
+
+
+def sample(regex, n, k, seed=None):
+    """从长度为 n 的、被正则表达式完全匹配的字符串中均匀抽取 k 个"""
+    return LanguageCounter(regex).sample(n, k, seed)
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    n = int(input("请输入字符串长度: "))
+    k = int(input("请输入采样个数: "))
+    counter = LanguageCounter(regex)
+    print(f"长度为 {n} 的匹配字符串共有 {counter.count(n)} 个")
+    for text in counter.sample(n, k):
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
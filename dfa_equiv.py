@@ -0,0 +1,170 @@
+from collections import deque
+
+from lazy_dfa import LazyDFA
+
+
+class UnionFind:
+    """带路径压缩和按秩合并的并查集"""
+
+    def __init__(self):
+        self.parent = {}
+        self.rank = {}
+
+    def find(self, item):
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.rank[item] = 0
+            return item
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        # 路径压缩
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, a, b):
+        """合并两个集合，如果原本就在同一集合中返回 False"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return True
+
+
+class ComparisonResult:
+    """
+    equivalent / includes 的结果
+
+    真值表示关系是否成立，可以直接用于 if；不成立时 counterexample 是最短的反例字符串，
+    成立时为 None。为了兼容旧的调用方式，也可以解包为 (是否成立, 反例)。
+    """
+    __slots__ = ('holds', 'counterexample')
+
+    def __init__(self, holds, counterexample=None):
+        self.holds = holds
+        self.counterexample = counterexample
+
+    def __bool__(self):
+        return self.holds
+
+    def __iter__(self):
+        return iter((self.holds, self.counterexample))
+
+    def __repr__(self):
+        return f"ComparisonResult({self.holds}, {self.counterexample!r})"
+
+
+def _as_lazy_dfa(regex):
+    """接受正则表达式字符串或已经构建好的 LazyDFA"""
+    if isinstance(regex, LazyDFA):
+        return regex
+    return LazyDFA.from_regex(regex)
+
+
+def _trace(parents, pair):
+    """沿父指针回溯，得到从起始状态对到达 pair 的输入串"""
+    symbols = []
+    while parents[pair] is not None:
+        pair, symbol = parents[pair]
+        symbols.append(symbol)
+    return ''.join(reversed(symbols))
+
+
+def equivalent(r1, r2):
+    """
+    判断两个正则表达式是否接受完全相同的语言（Hopcroft-Karp 算法）
+
+    两个DFA都是惰性构建的，只探索从起始状态对可达的部分，
+    用并查集合并已知等价的状态，接近线性时间，不需要完整构建或最小化DFA。
+
+    参数:
+        r1, r2: 正则表达式字符串（或 LazyDFA）
+
+    返回:
+        ComparisonResult，真值表示是否等价；不等价时 counterexample 是
+        被恰好一个表达式接受的最短字符串
+    """
+    dfa1, dfa2 = _as_lazy_dfa(r1), _as_lazy_dfa(r2)
+    alphabet = sorted(dfa1.alphabet | dfa2.alphabet)
+
+    # 两个DFA的状态放在同一个并查集中，用 (0, id) 和 (1, id) 区分
+    uf = UnionFind()
+    start = (dfa1.start, dfa2.start)
+    if dfa1.is_accepting(start[0]) != dfa2.is_accepting(start[1]):
+        return ComparisonResult(False, '')
+    uf.union((0, start[0]), (1, start[1]))
+    parents = {start: None}
+    queue = deque([start])
+
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        for symbol in alphabet:
+            next_pair = (dfa1.step(p, symbol), dfa2.step(q, symbol))
+            if not uf.union((0, next_pair[0]), (1, next_pair[1])):
+                continue
+            if next_pair not in parents:
+                parents[next_pair] = (pair, symbol)
+            if dfa1.is_accepting(next_pair[0]) != dfa2.is_accepting(next_pair[1]):
+                return ComparisonResult(False, _trace(parents, next_pair))
+            queue.append(next_pair)
+
+    return ComparisonResult(True)
+
+
+def includes(r1, r2):
+    """
+    判断 r1 的语言是否包含 r2 的语言，即 L(r2) ⊆ L(r1)
+
+    包含关系不对称，不能用并查集合并，这里在惰性乘积自动机上做广度优先搜索，
+    r2 已经进入死状态的分支会被直接剪掉。
+
+    返回:
+        ComparisonResult，真值表示是否包含；不包含时 counterexample 是
+        被 r2 接受但不被 r1 接受的最短字符串
+    """
+    dfa1, dfa2 = _as_lazy_dfa(r1), _as_lazy_dfa(r2)
+    alphabet = sorted(dfa2.alphabet)
+
+    start = (dfa1.start, dfa2.start)
+    if dfa2.is_accepting(start[1]) and not dfa1.is_accepting(start[0]):
+        return ComparisonResult(False, '')
+    parents = {start: None}
+    queue = deque([start])
+
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        for symbol in alphabet:
+            next_q = dfa2.step(q, symbol)
+            if next_q == dfa2.dead:
+                continue
+            next_pair = (dfa1.step(p, symbol), next_q)
+            if next_pair in parents:
+                continue
+            parents[next_pair] = (pair, symbol)
+            if dfa2.is_accepting(next_q) and not dfa1.is_accepting(next_pair[0]):
+                return ComparisonResult(False, _trace(parents, next_pair))
+            queue.append(next_pair)
+
+    return ComparisonResult(True)
+
+
+def main():
+    r1 = input("请输入第一个正则表达式: ")
+    r2 = input("请输入第二个正则表达式: ")
+    result = equivalent(r1, r2)
+    if result:
+        print("两个正则表达式等价")
+    else:
+        print(f"两个正则表达式不等价，反例: '{result.counterexample}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from collections import deque
+
+from graphviz_vv import State, DFA, match_dfa
+from lazy_dfa import LazyDFA
+
+
+class Pattern:
+    """
+    可以做布尔组合的正则表达式
+
+    支持的运算:
+        p1 & p2  交集：同时匹配两个表达式
+        p1 | p2  并集：匹配任意一个表达式
+        p1 - p2  差集：匹配 p1 但不匹配 p2
+        ~p       补集：不匹配 p（相对于所有参与运算的表达式的字母表）
+
+    组合后的表达式通过惰性乘积构造编译成普通的 DFA，可以直接交给 match_dfa 使用。
+    """
+
+    def __init__(self, regex=None, alphabet=None, _node=None):
+        self._node = _node if _node is not None else ('leaf', regex)
+        # 额外的字母表符号：补集默认只相对于表达式中出现过的符号
+        self.extra_alphabet = set(alphabet or ())
+        self._dfa = None
+
+    def _combine(self, op, *operands):
+        extra = set(self.extra_alphabet)
+        for operand in operands:
+            extra |= operand.extra_alphabet
+        node = (op, self._node) + tuple(operand._node for operand in operands)
+        return Pattern(alphabet=extra, _node=node)
+
+    def __and__(self, other):
+        return self._combine('and', other)
+
+    def __or__(self, other):
+        return self._combine('or', other)
+
+    def __sub__(self, other):
+        return self._combine('and', ~other)
+
+    def __invert__(self):
+        return self._combine('not')
+
+    def _leaves(self):
+        """按出现顺序收集所有叶子（相同的正则表达式只构建一次惰性DFA）"""
+        leaves = []
+        stack = [self._node]
+        while stack:
+            node = stack.pop()
+            if node[0] == 'leaf':
+                if node[1] not in leaves:
+                    leaves.append(node[1])
+            else:
+                stack.extend(reversed(node[1:]))
+        return leaves
+
+    def _evaluate(self, node, accepting):
+        """根据每个叶子是否接受，计算整个表达式是否接受"""
+        op = node[0]
+        if op == 'leaf':
+            return accepting[node[1]]
+        if op == 'not':
+            return not self._evaluate(node[1], accepting)
+        if op == 'and':
+            return self._evaluate(node[1], accepting) and self._evaluate(node[2], accepting)
+        return self._evaluate(node[1], accepting) or self._evaluate(node[2], accepting)
+
+    def to_dfa(self):
+        """
+        从起始状态组合出发惰性探索乘积自动机，编译成 DFA
+
+        每个叶子的惰性DFA都带有显式的死状态，所以乘积自动机是完全的，
+        补集只需要翻转接受条件。编译结果中，不接受且再也无法接受的
+        全死状态组合不会被物化，对应的转移直接省略（match_dfa 视为拒绝）。
+        """
+        if self._dfa is not None:
+            return self._dfa
+
+        regexes = self._leaves()
+        lazy_dfas = [LazyDFA.from_regex(regex) for regex in regexes]
+        alphabet = set(self.extra_alphabet)
+        for lazy_dfa in lazy_dfas:
+            alphabet |= lazy_dfa.alphabet
+        alphabet = sorted(alphabet)
+
+        def is_accepting(key):
+            accepting = {regex: lazy_dfa.is_accepting(state)
+                         for regex, lazy_dfa, state in zip(regexes, lazy_dfas, key)}
+            return self._evaluate(self._node, accepting)
+
+        dead_key = tuple(lazy_dfa.dead for lazy_dfa in lazy_dfas)
+        prune_dead = not is_accepting(dead_key)
+
+        dfa = DFA()
+        dfa.alphabet = set(alphabet)
+        states = {}
+
+        def add_state(key):
+            state = State(len(dfa.states))
+            dfa.states.append(state)
+            states[key] = state
+            if is_accepting(key):
+                dfa.add_end_state(state)
+            return state
+
+        start_key = tuple(lazy_dfa.start for lazy_dfa in lazy_dfas)
+        dfa.set_start_state(add_state(start_key))
+        queue = deque([start_key])
+        while queue:
+            key = queue.popleft()
+            for symbol in alphabet:
+                next_key = tuple(lazy_dfa.step(state, symbol)
+                                 for lazy_dfa, state in zip(lazy_dfas, key))
+                if prune_dead and next_key == dead_key:
+                    continue
+                if next_key not in states:
+                    add_state(next_key)
+                    queue.append(next_key)
+                dfa.add_transition(states[key], symbol, states[next_key])
+
+        self._dfa = dfa
+        return dfa
+
+    def match(self, input_string):
+        """判断字符串是否被组合后的表达式完全匹配"""
+        return match_dfa(self.to_dfa(), input_string)
+
+
+def main():
+    allow = input("请输入允许的正则表达式 A: ")
+    deny = input("请输入排除的正则表达式 B: ")
+    pattern = Pattern(allow) - Pattern(deny)
+    test_string = input("请输入要测试的字符串: ")
+    if pattern.match(test_string):
+        print(f"字符串 '{test_string}' 匹配 A 且不匹配 B")
+    else:
+        print(f"字符串 '{test_string}' 不满足 A - B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import asyncio
+import functools
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import gradio as gr
+
+MAX_WORKERS = os.cpu_count() or 1  # 进程池大小
+MAX_PENDING = 64                   # 同时在途（排队或执行中）的任务数上限
+CACHE_SIZE = 128                   # 结果缓存保留的条目数
+TIMEOUT = 30.0                     # 每个请求的默认超时时间（秒）
+
+
+def is_error_result(result):
+    """处理函数捕获异常后返回的结果：界面中的 process_* 函数用 "错误: " 开头的文本报告错误"""
+    values = result if isinstance(result, tuple) else (result,)
+    return any(isinstance(value, str) and "错误: " in value for value in values)
+
+
+class _Job:
+    """进程池中的一个任务，以及正在等待它的请求数"""
+    __slots__ = ('task', 'pool', 'future', 'waiters', 'is_error')
+
+    def __init__(self, task, pool, is_error):
+        self.task = task                        # 进程池返回的 concurrent.futures.Future
+        self.pool = pool                        # 执行该任务的进程池
+        self.future = asyncio.wrap_future(task)  # 事件循环中等待用的 Future
+        self.waiters = 0
+        self.is_error = is_error                # 判断结果是否为错误，错误结果不写入缓存
+
+
+class Backend:
+    """
+    Gradio 界面的计算后端
+
+    正则表达式编译和 Graphviz 渲染都在有界的进程池中执行，事件循环只负责等待，
+    一个耗时的表达式不会阻塞其他用户。结果按 (函数, 参数) 放在所有会话共享的LRU缓存中，
+    相同参数的并发请求共用同一个任务。
+
+    超时或取消时，如果已经没有请求在等待该任务：还在排队的任务被撤销，
+    已经开始执行的任务无法单独中断，于是终止整个进程池的工作进程并换用新的进程池，
+    同一进程池中其他任务的请求会收到重试提示。
+    错误结果（例如 Graphviz 暂时不可用）只返回给当前等待的请求，不写入缓存；
+    工作进程异常退出导致进程池损坏时，丢弃该进程池，下一个请求会创建新的进程池。
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING,
+                 cache_size=CACHE_SIZE, timeout=TIMEOUT):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self._pool = None
+        self._cache = OrderedDict()  # (模块, 函数名, 参数) -> 结果
+        self._jobs = {}              # (模块, 函数名, 参数) -> _Job
+        self.counters = {'hits': 0, 'misses': 0, 'timeouts': 0, 'cancelled': 0, 'rejected': 0,
+                         'errors': 0, 'pool_restarts': 0, 'killed': 0}
+
+    def _executor(self):
+        """第一次使用时才创建进程池"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers)
+        return self._pool
+
+    def _discard_pool(self, pool):
+        """丢弃已经损坏的进程池，之后的请求会重新创建"""
+        if self._pool is pool:
+            self._pool = None
+            self.counters['pool_restarts'] += 1
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _kill_pool(self, pool):
+        """终止进程池的所有工作进程，中断正在执行的任务，之后的请求会重新创建进程池"""
+        self.counters['killed'] += 1
+        if self._pool is pool:
+            self._pool = None
+            self.counters['pool_restarts'] += 1
+        # 不撤销排队的任务：进程被终止后，进程池的管理线程把其余任务都标记为 BrokenProcessPool，
+        # 等待它们的请求会收到重试提示，而不是被当作取消
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False)
+
+    def _finish(self, key, job, future):
+        """任务结束后的回调：移出在途列表，成功且不是错误的结果写入缓存"""
+        if self._jobs.get(key) is job:
+            del self._jobs[key]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._discard_pool(job.pool)
+            return
+        if job.is_error is not None and job.is_error(future.result()):
+            self.counters['errors'] += 1
+            return
+        self._cache[key] = future.result()
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def run(self, func, *args, timeout=None, is_error=is_error_result):
+        """
+        在进程池中执行 func(*args) 并等待结果
+
+        func 必须是模块顶层函数（可以被 pickle），参数必须可哈希。
+        is_error(结果) 为真的结果不写入缓存，传入 None 表示缓存所有结果。
+        超时抛出 TimeoutError，在途任务过多或工作进程异常退出时抛出 RuntimeError。
+        """
+        key = (func.__module__, func.__qualname__, args)
+        if key in self._cache:
+            self.counters['hits'] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.counters['misses'] += 1
+
+        job = self._jobs.get(key)
+        if job is None:
+            if len(self._jobs) >= self.max_pending:
+                self.counters['rejected'] += 1
+                raise RuntimeError("服务繁忙，请稍后再试")
+            pool = self._executor()
+            try:
+                task = pool.submit(func, *args)
+            except BrokenProcessPool:
+                # 进程池已经损坏但还没有任务结束时发现，换一个新的进程池重新提交
+                self._discard_pool(pool)
+                pool = self._executor()
+                task = pool.submit(func, *args)
+            job = _Job(task, pool, is_error)
+            job.future.add_done_callback(functools.partial(self._finish, key, job))
+            self._jobs[key] = job
+
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout or self.timeout)
+        except BrokenProcessPool:
+            self._discard_pool(job.pool)
+            raise RuntimeError("工作进程异常退出，已重新创建进程池，请重试") from None
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise TimeoutError(f"处理超时（超过 {timeout or self.timeout:g} 秒）") from None
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+            raise
+        finally:
+            job.waiters -= 1
+            if job.waiters == 0 and not job.future.done():
+                # 没有请求在等待了：撤销还在排队的任务，已经开始执行的任务只能终止工作进程
+                if not job.task.cancel():
+                    self._kill_pool(job.pool)
+
+    def metrics(self):
+        """
+        队列深度、缓存和计数器统计
+
+        running 是已经交给工作进程的任务数，包含进程池预取到调用队列中的任务。
+        """
+        running = sum(1 for job in self._jobs.values() if job.task.running())
+        return {
+            'workers': self.max_workers,
+            'running': running,
+            'queued': len(self._jobs) - running,
+            'waiting_requests': sum(job.waiters for job in self._jobs.values()),
+            'max_pending': self.max_pending,
+            'cache_entries': len(self._cache),
+            **self.counters,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+backend = Backend()
+
+
+def async_handler(func, on_error):
+    """
+    把同步的处理函数包装成异步的 Gradio 事件处理函数
+
+    参数:
+        func: 模块顶层的处理函数，在进程池中执行
+        on_error: 超时或服务繁忙时调用 on_error(错误信息)，返回与 func 相同形状的结果
+    """
+    @functools.wraps(func)
+    async def handler(*args):
+        try:
+            return await backend.run(func, *args)
+        except (TimeoutError, RuntimeError) as e:
+            return on_error(str(e))
+    return handler
+
+
+def add_controls(event):
+    """在当前界面中添加取消按钮和队列状态显示，需要在 gr.Blocks 上下文中调用"""
+    with gr.Row():
+        cancel_btn = gr.Button("取消")
+        status_btn = gr.Button("刷新队列状态")
+    status = gr.JSON(label="队列状态")
+    cancel_btn.click(None, cancels=[event])
+    status_btn.click(backend.metrics, outputs=status, queue=False)
+
+
+def enable_queue(iface):
+    """开启请求排队，允许多个请求同时在进程池中执行"""
+    return iface.queue(max_size=MAX_PENDING, default_concurrency_limit=MAX_WORKERS * 2)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def compile_min_dfa(regex):
+    """编译正则表达式为最小化DFA，结果在当前进程内缓存"""
+    from graphviz_vv import regex_to_nfa, nfa_to_dfa, minimize_dfa
+    return minimize_dfa(nfa_to_dfa(regex_to_nfa(regex)))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def compile_counted_dfa(regex):
+    """
+    编译正则表达式为带计数器的惰性DFA，结果在当前进程内缓存
+
+    计数重复不展开，compile_min_dfa 因上下限过大（RepeatTooLargeError）拒绝时用它匹配。
+    """
+    from counted_nfa import CountedLazyDFA
+    return CountedLazyDFA.from_regex(regex)
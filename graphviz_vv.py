@@ -4,8 +4,11 @@ import io
 from PIL import Image
 import gradio as gr
 from collections import defaultdict
+from gradio_backend import async_handler, add_controls, enable_queue
 
 class State:
+    __slots__ = ('id', 'transitions', 'is_end', 'epsilon_transitions')
+
     def __init__(self, id):
         self.id = id
         self.transitions = {}
@@ -96,20 +99,63 @@ def move(nfa, states, symbol):
     return result
 
 
+# 计数重复在显式NFA中按上限展开，展开后的状态总数超过这个值时报错；
+# 只需要匹配时 match_regex 使用带计数器的NFA，不受这个限制
+MAX_REPEAT_STATES = 1000
+
+
+class RepeatTooLargeError(ValueError):
+    """表达式合法，但计数重复展开后超过 MAX_REPEAT_STATES，无法构建显式的NFA/DFA"""
+
+
 def regex_to_nfa(regex):
     # 将正则表达式转换为NFA
-    operators = {'|', '*', '(', ')', '.'}
+    operators = {'|', '*', '+', '?', '(', ')', '.'}
     alphabet = set(c for c in regex if c not in operators)
     alphabet.add('ε')  # 添加ε到字母表
 
-    def parse_regex(regex):
+    def is_repeat(token):
+        # {m,n} 计数重复在记号化后是一个多字符记号
+        return len(token) > 1 and token[0] == '{'
+
+    def tokenize(regex):
+        # 把正则表达式拆分为记号，{m,n} 整体作为一个记号
+        tokens = []
+        i = 0
+        while i < len(regex):
+            if regex[i] == '{':
+                j = regex.find('}', i)
+                if j == -1:
+                    raise ValueError(f"无效的表达式: 位置 {i} 的 {{ 没有匹配的 }}")
+                tokens.append(regex[i:j + 1])
+                i = j + 1
+            else:
+                tokens.append(regex[i])
+                i += 1
+        return tokens
+
+    def parse_repeat(token):
+        # 解析 {m}、{m,} 或 {m,n}，n 为 None 表示没有上限
+        low, sep, high = token[1:-1].partition(',')
+        if not low.strip().isdigit() or (high.strip() and not high.strip().isdigit()):
+            raise ValueError(f"无效的计数重复: {token}")
+        low = int(low)
+        if not sep:
+            return low, low
+        high = int(high) if high.strip() else None
+        if high is not None and high < low:
+            raise ValueError(f"无效的计数重复: {token} 的上限小于下限")
+        return low, high
+
+    def parse_regex(tokens):
         # 为连接操作添加显式的.操作符
         result = []
-        for i in range(len(regex)):
-            result.append(regex[i])
-            if i + 1 < len(regex) and regex[i] not in '(|' and regex[i + 1] not in ')|*':
+        for i in range(len(tokens)):
+            result.append(tokens[i])
+            if (i + 1 < len(tokens) and tokens[i] not in ('(', '|') and
+                    tokens[i + 1] not in (')', '|', '*', '+', '?') and not is_repeat(tokens[i + 1])):
                 result.append('.')
-        return ''.join(result)
+        return result
 
     def create_basic_nfa(symbol):
         # 创建基本NFA（单个符号）
@@ -250,14 +296,93 @@ def regex_to_nfa(regex):
         
         return nfa
 
+    def copy_into(nfa, nfa1):
+        # 把nfa1的状态和转移复制到nfa中，返回复制后的起始状态和结束状态列表
+        state_map = {}
+        for state in nfa1.states:
+            state_map[state.id] = nfa.add_state(State(len(nfa.states)))
+        for state in nfa1.states:
+            mapped_state = state_map[state.id]
+            for symbol, targets in state.transitions.items():
+                for target in targets:
+                    nfa.add_transition(mapped_state, symbol, state_map[target.id])
+        return state_map[nfa1.start_state.id], [state_map[s.id] for s in nfa1.end_states]
+
+    def plus_nfa(nfa1):
+        # 创建正闭包NFA：与Kleene星相同，但不允许跳过整个NFA
+        nfa = NFA()
+        start = nfa.add_state(State(0))
+        end = nfa.add_state(State(1))
+        nfa.set_start_state(start)
+        nfa.add_end_state(end)
+        
+        copy_start, copy_ends = copy_into(nfa, nfa1)
+        nfa.add_transition(start, 'ε', copy_start)
+        for copy_end in copy_ends:
+            nfa.add_transition(copy_end, 'ε', copy_start)  # 循环
+            nfa.add_transition(copy_end, 'ε', end)
+        return nfa
+
+    def optional_nfa(nfa1):
+        # 创建可选NFA：匹配nfa1或空串
+        nfa = NFA()
+        start = nfa.add_state(State(0))
+        end = nfa.add_state(State(1))
+        nfa.set_start_state(start)
+        nfa.add_end_state(end)
+        nfa.add_transition(start, 'ε', end)  # 允许跳过整个NFA
+        
+        copy_start, copy_ends = copy_into(nfa, nfa1)
+        nfa.add_transition(start, 'ε', copy_start)
+        for copy_end in copy_ends:
+            nfa.add_transition(copy_end, 'ε', end)
+        return nfa
+
+    def repeat_nfa(nfa1, low, high):
+        # 计数重复 {m,n}：在一个新NFA中依次复制子自动机，每份只复制一次，
+        # 避免反复调用 concat_nfa 时把已经拼好的部分重新复制（那样是平方级的）
+        nfa = NFA()
+        start = nfa.add_state(State(0))
+        end = nfa.add_state(State(1))
+        nfa.set_start_state(start)
+        nfa.add_end_state(end)
+        
+        copies = high if high is not None else max(low, 1)
+        nonlocal expanded_states
+        expanded_states += copies * (len(nfa1.states) + 1)
+        if expanded_states > MAX_REPEAT_STATES:
+            raise RepeatTooLargeError(f"计数重复展开后超过 {MAX_REPEAT_STATES} 个NFA状态，"
+                                      f"无法构建显式的NFA/DFA，请减小重复的上下限")
+        current = start
+        for k in range(copies):
+            if k >= low:
+                nfa.add_transition(current, 'ε', end)  # 已经满足下限，可以提前结束
+            copy_start, copy_ends = copy_into(nfa, nfa1)
+            nfa.add_transition(current, 'ε', copy_start)
+            joint = nfa.add_state(State(len(nfa.states)))
+            for copy_end in copy_ends:
+                nfa.add_transition(copy_end, 'ε', joint)
+            if high is None and k == copies - 1:
+                nfa.add_transition(joint, 'ε', copy_start)  # 没有上限时最后一份可以无限重复
+            current = joint
+        nfa.add_transition(current, 'ε', end)
+        return nfa
+
     # 使用Shunting Yard算法解析正则表达式
     def shunting_yard(regex):
         output_queue = []
         operator_stack = []
-        precedence = {'|': 1, '.': 2, '*': 3}
+        precedence = {'|': 1, '.': 2, '*': 3, '+': 3, '?': 3}
         
         for c in regex:
-            if c not in operators:
+            if is_repeat(c):
+                # 计数重复与 * 一样是后缀运算符：先弹出栈中同级的后缀运算符（如 a*{2} 中的 *），
+                # 保证它作用于已经应用了前面后缀运算符的操作数
+                while (operator_stack and operator_stack[-1] != '(' and
+                       precedence.get(operator_stack[-1], 0) >= precedence['*']):
+                    output_queue.append(operator_stack.pop())
+                output_queue.append(c)
+            elif c not in operators:
                 output_queue.append(c)
             elif c == '(':
                 operator_stack.append(c)
@@ -279,11 +404,21 @@ def regex_to_nfa(regex):
     def evaluate_postfix(postfix):
         stack = []
         for c in postfix:
-            if c not in operators:
+            if is_repeat(c):
+                nfa1 = stack.pop()
+                low, high = parse_repeat(c)
+                stack.append(repeat_nfa(nfa1, low, high))
+            elif c not in operators:
                 stack.append(create_basic_nfa(c))
             elif c == '*':
                 nfa1 = stack.pop()
                 stack.append(kleene_star_nfa(nfa1))
+            elif c == '+':
+                nfa1 = stack.pop()
+                stack.append(plus_nfa(nfa1))
+            elif c == '?':
+                nfa1 = stack.pop()
+                stack.append(optional_nfa(nfa1))
             elif c == '.':
                 nfa2 = stack.pop()
                 nfa1 = stack.pop()
@@ -296,7 +431,8 @@ def regex_to_nfa(regex):
         return stack.pop()
 
     # 处理正则表达式
-    regex = parse_regex(regex)
+    expanded_states = 0  # 计数重复展开出的状态数，由 repeat_nfa 累计
+    regex = parse_regex(tokenize(regex))
     postfix = shunting_yard(regex)
     nfa = evaluate_postfix(postfix)
     return nfa
@@ -314,7 +450,7 @@ def nfa_to_dfa(nfa):
     
     # 使用广度优先搜索构建DFA
     unmarked_states = [start_states]
-    state_sets = {frozenset(s.id for s in start_states): dfa_start}
+    state_sets = dfa.state_map  # 复用DFA中已有的映射，避免重复保存状态集合
     
     while unmarked_states:
         current_states = unmarked_states.pop(0)
@@ -334,7 +470,6 @@ def nfa_to_dfa(nfa):
             # 如果这个状态集合是新的，创建一个新的DFA状态
             if next_states_key not in state_sets:
                 next_dfa_state = dfa.add_state(next_states)
-                state_sets[next_states_key] = next_dfa_state
                 unmarked_states.append(next_states)
             else:
                 next_dfa_state = state_sets[next_states_key]
@@ -439,22 +574,30 @@ def minimize_dfa(dfa):
     return min_dfa
 
 def match_regex(regex, input_string):
+    if '{' in regex:
+        # 含计数重复时使用带计数器的惰性DFA，编译时间和内存与上下限无关
+        from counted_nfa import CountedLazyDFA
+        return CountedLazyDFA.from_regex(regex).accepts(input_string)
+    
     # 构建并最小化DFA
     nfa = regex_to_nfa(regex)
     dfa = nfa_to_dfa(nfa)
     min_dfa = minimize_dfa(dfa)
     
     # 使用最小化DFA来匹配输入字符串
-    current_state = min_dfa.start_state
+    return match_dfa(min_dfa, input_string)
+
+def match_dfa(dfa, input_string):
+    # 使用任意DFA匹配输入字符串，缺少的转移视为拒绝
+    current_state_id = dfa.start_state.id
     for c in input_string:
-        transition_key = (current_state.id, c)
-        if transition_key not in min_dfa.transitions:
+        transition_key = (current_state_id, c)
+        if transition_key not in dfa.transitions:
             return False
-        current_state_id = min_dfa.transitions[transition_key]
-        current_state = next(state for state in min_dfa.states if state.id == current_state_id)
+        current_state_id = dfa.transitions[transition_key]
     
     # 如果最终状态是接受状态，则匹配成功
-    return current_state in min_dfa.end_states
+    return any(state.id == current_state_id for state in dfa.end_states)
 
 # 使用Graphviz的可视化函数
 def visualize_nfa(nfa):
@@ -535,8 +678,16 @@ def visualize_dfa(dfa, title="DFA"):
 # 处理正则表达式的函数
 def process_regex(regex, test_string):
     try:
+        # 检查测试字符串是否匹配（计数重复不展开，较大的上下限也可以匹配）
+        match_result = match_regex(regex, test_string)
+        match_text = f"字符串 '{test_string}' {'匹配' if match_result else '不匹配'} 正则表达式 '{regex}'"
+        
         # 处理正则表达式
-        nfa = regex_to_nfa(regex)
+        try:
+            nfa = regex_to_nfa(regex)
+        except RepeatTooLargeError as e:
+            # 表达式本身合法（已经完成匹配），只是展开后太大，无法画出自动机
+            return None, None, None, f"{match_text}（{e}）"
         dfa = nfa_to_dfa(nfa)
         min_dfa = minimize_dfa(dfa)
         
@@ -545,10 +696,6 @@ def process_regex(regex, test_string):
         dfa_viz = visualize_dfa(dfa)
         min_dfa_viz = visualize_dfa(min_dfa, "最小化 DFA")
         
-        # 检查测试字符串是否匹配
-        match_result = match_regex(regex, test_string)
-        match_text = f"字符串 '{test_string}' {'匹配' if match_result else '不匹配'} 正则表达式 '{regex}'"
-        
         return (
             nfa_viz, 
             dfa_viz, 
@@ -580,11 +727,12 @@ with gr.Blocks(title="正则表达式可视化工具") as iface:
     with gr.Tab("最小化 DFA 自动机"):
         min_dfa_graph = gr.Image(label="最小化 DFA 图")
     
-    process_btn.click(
-        process_regex, 
+    process_event = process_btn.click(
+        async_handler(process_regex, lambda message: (None, None, None, f"错误: {message}")),
         inputs=[regex_input, test_string], 
         outputs=[nfa_graph, dfa_graph, min_dfa_graph, match_result]
     )
+    add_controls(process_event)
     
     gr.Markdown("""
     ## 使用指南
@@ -596,9 +744,14 @@ with gr.Blocks(title="正则表达式可视化工具") as iface:
     ## 支持的运算符
     - `|` (选择): a|b 匹配 a 或 b
     - `*` (克莱尼星号): a* 匹配零个或多个 a
+    - `+` (正闭包): a+ 匹配一个或多个 a
+    - `?` (可选): a? 匹配零个或一个 a
+    - `{m,n}` (计数重复): a{2,4} 匹配 2 到 4 个 a，`{m}` 恰好 m 个，`{m,}` 至少 m 个
     - `()` (分组): (ab)* 匹配零个或多个 ab
     """)
 
+enable_queue(iface)
+
 # 启动应用
 if __name__ == "__main__":
     iface.launch()
\ No newline at end of file
@@ -0,0 +1,87 @@
+from graphviz_vv import regex_to_nfa, epsilon_closure, move
+
+
+class LazyDFA:
+    """
+    按需构建的DFA：只有真正被访问到的NFA状态集合才会被物化为DFA状态
+
+    DFA状态用整数编号，空集合（死状态）总是存在，可以用 dead 属性判断。
+    与 nfa_to_dfa 不同，这里不会预先展开全部可达状态，也不做最小化。
+    子类可以重写 _initial_set / _successor / _accepting_set，
+    把其他形式的NFA（例如带计数器的NFA）接入同一套惰性构建逻辑。
+    """
+
+    def __init__(self, nfa):
+        self.nfa = nfa
+        self.alphabet = set(nfa.alphabet)
+        self._sets = []          # DFA状态ID -> NFA状态集合
+        self._ids = {}           # NFA状态集合 -> DFA状态ID
+        self._accepting = []     # DFA状态ID -> 是否为接受状态
+        self._transitions = []   # DFA状态ID -> {符号: 目标DFA状态ID}
+        self.dead = self._intern(frozenset())
+        self.start = self._intern(self._initial_set())
+
+    @classmethod
+    def from_regex(cls, regex):
+        """
+        从正则表达式构建惰性DFA
+
+        含有 {m,n} 计数重复的表达式使用带计数器的NFA，
+        避免按上限展开出大量重复的子自动机。
+        """
+        if cls is LazyDFA and '{' in regex:
+            from counted_nfa import CountedLazyDFA
+            return CountedLazyDFA.from_regex(regex)
+        return cls(regex_to_nfa(regex))
+
+    def _initial_set(self):
+        """起始DFA状态对应的NFA状态集合"""
+        return frozenset(epsilon_closure(self.nfa, {self.nfa.start_state}))
+
+    def _successor(self, states, symbol):
+        """NFA状态集合读入一个符号后的NFA状态集合"""
+        return frozenset(epsilon_closure(self.nfa, move(self.nfa, states, symbol)))
+
+    def _accepting_set(self, states):
+        """NFA状态集合是否包含接受状态"""
+        return any(state.is_end for state in states)
+
+    def _intern(self, states):
+        """为NFA状态集合分配DFA状态ID"""
+        state_id = self._ids.get(states)
+        if state_id is None:
+            state_id = len(self._sets)
+            self._ids[states] = state_id
+            self._sets.append(states)
+            self._accepting.append(self._accepting_set(states))
+            self._transitions.append({})
+        return state_id
+
+    def step(self, state_id, symbol):
+        """计算DFA状态读入一个符号后的目标状态，第一次访问时才真正计算"""
+        transitions = self._transitions[state_id]
+        target = transitions.get(symbol)
+        if target is None:
+            if state_id == self.dead or symbol not in self.alphabet:
+                target = self.dead
+            else:
+                target = self._intern(self._successor(self._sets[state_id], symbol))
+            transitions[symbol] = target
+        return target
+
+    def is_accepting(self, state_id):
+        """判断DFA状态是否为接受状态"""
+        return self._accepting[state_id]
+
+    def __len__(self):
+        """已经物化的DFA状态数（包括死状态）"""
+        return len(self._sets)
+
+    def accepts(self, text):
+        """判断字符串是否被接受"""
+        state = self.start
+        for char in text:
+            state = self.step(state, char)
+            if state == self.dead:
+                return False
+        return self.is_accepting(state)
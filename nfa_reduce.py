@@ -0,0 +1,162 @@
+def _closure(state):
+    """单个状态的ε闭包（按 transitions 中的 'ε' 键计算，兼容各版本的 State）"""
+    closure = {state}
+    stack = [state]
+    while stack:
+        current = stack.pop()
+        for target in current.transitions.get('ε', ()):
+            if target not in closure:
+                closure.add(target)
+                stack.append(target)
+    return closure
+
+
+def nfa_size(nfa):
+    """统计NFA的状态数、非ε转移数和ε转移数"""
+    transitions = epsilon = 0
+    for state in nfa.states:
+        for symbol, targets in state.transitions.items():
+            if symbol == 'ε':
+                epsilon += len(targets)
+            else:
+                transitions += len(targets)
+    return {'states': len(nfa.states), 'transitions': transitions, 'epsilon': epsilon}
+
+
+def _new_like(nfa, n_states, start, accepting, edges):
+    """
+    按原NFA的类型构建结果，使其仍然可以交给原来的可视化和转换函数
+
+    NFA.py 使用 create_state/set_start/add_end，
+    NFA2.py 和 graphviz_vv.py 使用 add_state/set_start_state/add_end_state。
+    """
+    result = type(nfa)()
+    if hasattr(result, 'create_state'):
+        states = [result.create_state() for _ in range(n_states)]
+        result.set_start(states[start])
+        add_end = result.add_end
+    else:
+        state_class = type(nfa.start_state)
+        states = [result.add_state(state_class(i)) for i in range(n_states)]
+        result.set_start_state(states[start])
+        add_end = result.add_end_state
+    for i in sorted(accepting):
+        add_end(states[i])
+    for from_id, symbol, to_id in sorted(edges):
+        result.add_transition(states[from_id], symbol, states[to_id])
+    return result
+
+
+def remove_epsilon(nfa):
+    """
+    消除ε转移
+
+    每个状态直接获得其ε闭包中所有状态的符号转移，
+    闭包中含有接受状态时该状态也成为接受状态。
+
+    返回:
+        (起始状态下标, 接受状态下标集合, 转移集合 {(源, 符号, 目标)})，下标对应 nfa.states 的顺序
+    """
+    index = {id(state): i for i, state in enumerate(nfa.states)}
+    accepting = set()
+    edges = set()
+    for i, state in enumerate(nfa.states):
+        for member in _closure(state):
+            if member.is_end:
+                accepting.add(i)
+            for symbol, targets in member.transitions.items():
+                if symbol == 'ε':
+                    continue
+                for target in targets:
+                    edges.add((i, symbol, index[id(target)]))
+    return index[id(nfa.start_state)], accepting, edges
+
+
+def prune(n_states, start, accepting, edges):
+    """
+    删除从起始状态不可达的状态，以及无法到达接受状态的死状态
+
+    返回重新编号后的 (状态数, 起始状态, 接受状态集合, 转移集合)。
+    起始状态总是保留，即使它是死状态（此时语言为空）。
+    """
+    forward = [[] for _ in range(n_states)]
+    backward = [[] for _ in range(n_states)]
+    for from_id, _, to_id in edges:
+        forward[from_id].append(to_id)
+        backward[to_id].append(from_id)
+
+    def reach(sources, graph):
+        seen = set(sources)
+        stack = list(sources)
+        while stack:
+            current = stack.pop()
+            for target in graph[current]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return seen
+
+    keep = reach([start], forward) & reach(accepting, backward)
+    keep.add(start)
+    renumber = {old: new for new, old in enumerate(sorted(keep))}
+    return (len(keep), renumber[start],
+            {renumber[s] for s in accepting if s in keep},
+            {(renumber[f], a, renumber[t]) for f, a, t in edges if f in keep and t in keep})
+
+
+def merge_bisimilar(n_states, start, accepting, edges):
+    """
+    合并（前向）互模拟等价的状态
+
+    从"接受/非接受"两个块出发反复细化：两个状态留在同一块中，
+    当且仅当接受性相同，且对每个符号能到达的块集合相同。
+    互模拟等价的状态接受相同的语言，合并后语言不变。
+    """
+    outgoing = [[] for _ in range(n_states)]
+    for from_id, symbol, to_id in edges:
+        outgoing[from_id].append((symbol, to_id))
+
+    block = [1 if i in accepting else 0 for i in range(n_states)]
+    n_blocks = len(set(block))
+    while True:
+        signatures = {}
+        new_block = []
+        for i in range(n_states):
+            signature = (block[i], frozenset((symbol, block[t]) for symbol, t in outgoing[i]))
+            new_block.append(signatures.setdefault(signature, len(signatures)))
+        block = new_block
+        if len(signatures) == n_blocks:
+            break
+        n_blocks = len(signatures)
+
+    return (n_blocks, block[start],
+            {block[s] for s in accepting},
+            {(block[f], a, block[t]) for f, a, t in edges})
+
+
+def reduce_nfa(nfa):
+    """
+    NFA优化：消除ε转移、删除不可达和死状态、合并互模拟等价的状态
+
+    参数:
+        nfa: NFA.py、NFA2.py 或 graphviz_vv.py 中的 NFA
+
+    返回:
+        (优化后的NFA, 报告)。优化后的NFA与输入类型相同、语言相同；
+        报告形如 {'before': nfa_size(...), 'after': nfa_size(...)}
+    """
+    start, accepting, edges = remove_epsilon(nfa)
+    reduced = prune(len(nfa.states), start, accepting, edges)
+    reduced = merge_bisimilar(*reduced)
+    # 合并后可能出现新的可删除状态（例如合并成的死状态），再清理一次
+    reduced = prune(*reduced)
+    result = _new_like(nfa, *reduced)
+    return result, {'before': nfa_size(nfa), 'after': nfa_size(result)}
+
+
+def format_report(report):
+    """把优化报告格式化为一行文字"""
+    before, after = report['before'], report['after']
+    return (f"状态 {before['states']} -> {after['states']}，"
+            f"转移 {before['transitions']} -> {after['transitions']}，"
+            f"ε转移 {before['epsilon']} -> {after['epsilon']}")
@@ -0,0 +1,186 @@
+import copy
+import os
+import pickle
+import random
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from petri_ensemble import wilson_interval
+
+_worker_net = None  # 工作进程中的原始Petri网，由 _init_worker 设置一次
+
+
+def run_rng(master_seed, run_index):
+    """
+    第 run_index 次运行的随机数生成器
+
+    与 SeedSequence(master_seed).spawn(n)[run_index] 是同一个子序列，
+    各次运行的随机数流互相独立，且只由 (主种子, 运行编号) 决定。
+    """
+    child = np.random.SeedSequence(master_seed, spawn_key=(run_index,))
+    return random.Random(int.from_bytes(child.generate_state(4).tobytes(), 'little'))
+
+
+def run_once(net, max_steps, rng):
+    """
+    在Petri网的副本上做一次随机游走，不打印任何内容
+
+    返回:
+        (违规 (主机, 上一次接收步骤, 本次接收步骤) 或 None, 执行的步数, 是否因没有可启用转换而停止)
+    """
+    net = copy.deepcopy(net)
+    for step in range(max_steps):
+        if net.random_step(step, rng) is None:
+            return None, step, True
+        if net.monitor.first is not None:
+            return net.monitor.first, step + 1, False
+    return None, max_steps, False
+
+
+def rerun(net, master_seed, run_index, max_steps=1000):
+    """按主种子和运行编号精确重现一次运行"""
+    return run_once(net, max_steps, run_rng(master_seed, run_index))
+
+
+# 在新的解释器中重现一次运行：从标准输入读取 (net, 主种子, 运行编号, 最大步数)，结果写到标准输出
+_RERUN_CHILD = """
+import pickle, sys
+sys.path.insert(0, sys.argv[1])
+from petri_campaign import rerun
+net, master_seed, run_index, max_steps = pickle.load(sys.stdin.buffer)
+pickle.dump(rerun(net, master_seed, run_index, max_steps), sys.stdout.buffer)
+"""
+
+
+def check_rerun(net, master_seed, run_index, max_steps=1000, hash_seeds=(1, 2)):
+    """
+    检查一次运行能否在新的解释器中精确重现
+
+    在当前进程中执行 rerun，再用不同的 PYTHONHASHSEED 启动子进程各执行一次，
+    结果（违规、步数、是否停止）全部相同时返回 True。
+    spawn 方式启动的工作进程与这里的子进程一样没有继承父进程的哈希种子。
+    """
+    expected = rerun(net, master_seed, run_index, max_steps)
+    payload = pickle.dumps((net, master_seed, run_index, max_steps))
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for hash_seed in hash_seeds:
+        env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+        output = subprocess.run([sys.executable, '-c', _RERUN_CHILD, directory], input=payload,
+                                capture_output=True, env=env, check=True).stdout
+        if pickle.loads(output) != expected:
+            return False
+    return True
+
+
+def _init_worker(net):
+    global _worker_net
+    _worker_net = net
+
+
+def _run_chunk(master_seed, run_indices, max_steps):
+    """工作进程：依次执行一批运行"""
+    return [(i,) + run_once(_worker_net, max_steps, run_rng(master_seed, i)) for i in run_indices]
+
+
+class CampaignResult:
+    """模拟活动的汇总结果，结果流式到达时逐个累加"""
+
+    def __init__(self, master_seed, max_steps):
+        self.master_seed = master_seed
+        self.max_steps = max_steps
+        self.runs = 0
+        self.total_steps = 0
+        self.deadlocks = 0
+        self.violations = []  # (运行编号, 主机, 上一次接收步骤, 本次接收步骤)
+
+    def add(self, run_index, violation, steps, deadlocked):
+        self.runs += 1
+        self.total_steps += steps
+        self.deadlocks += deadlocked
+        if violation is not None:
+            self.violations.append((run_index,) + tuple(violation))
+
+    def probability(self, z=1.96):
+        """发现违规的概率估计，返回 (估计值, 下界, 上界)"""
+        low, high = wilson_interval(len(self.violations), self.runs, z)
+        return (len(self.violations) / self.runs if self.runs else 0.0), low, high
+
+
+def run_campaign(net, runs, max_steps=1000, master_seed=0, workers=None, chunk_size=64,
+                 on_result=None):
+    """
+    在进程池中并行执行大量随机游走
+
+    Petri网通过进程池的 initializer 只向每个工作进程传送一次，
+    任务只包含运行编号；每次运行的随机数流由 run_rng(master_seed, 运行编号) 派生，
+    所以结果与工作进程数和调度顺序无关，任何一次运行都可以用 rerun 重现。
+
+    参数:
+        net: Petri_simulation.PetriNet（初始标记）
+        runs: 运行次数
+        max_steps: 每次运行的最大步数
+        master_seed: 主种子
+        workers: 工作进程数，None 表示使用CPU核数，1 表示在当前进程中执行
+        chunk_size: 每个任务包含的运行数
+        on_result: 每次运行结束时调用 on_result(运行编号, 违规, 步数, 是否停止)
+
+    返回:
+        CampaignResult，violations 按运行编号排序
+    """
+    result = CampaignResult(master_seed, max_steps)
+
+    def collect(records):
+        for record in records:
+            result.add(*record)
+            if on_result is not None:
+                on_result(*record)
+
+    chunks = (range(start, min(start + chunk_size, runs)) for start in range(0, runs, chunk_size))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(net)
+        for indices in chunks:
+            collect(_run_chunk(master_seed, indices, max_steps))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(net,)) as pool:
+            pending = deque()
+            for indices in chunks:
+                pending.append(pool.submit(_run_chunk, master_seed, indices, max_steps))
+                # 限制在途任务数，按提交顺序边等待边汇总
+                while len(pending) >= 2 * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    result.violations.sort()
+    return result
+
+
+def main():
+    from Petri_simulation import parse_input
+
+    print("Petri网络并行模拟")
+    print("读取网络配置...")
+    net = parse_input()
+    runs = int(input("运行次数: ") or 1000)
+    max_steps = int(input("每次运行的最大步数: ") or 1000)
+    master_seed = int(input("主种子: ") or 0)
+    result = run_campaign(net, runs, max_steps, master_seed)
+    p, low, high = result.probability()
+    print(f"\n{result.runs} 次运行中有 {len(result.violations)} 次发现违规，"
+          f"概率 {p:.4f}（95% 置信区间 {low:.4f} - {high:.4f}）")
+    print(f"{result.deadlocks} 次运行因没有可启用的转换而停止")
+    for run_index, host, step1, step2 in result.violations[:10]:
+        print(f"运行 {run_index}: 主机 {host} 在步骤 {step1} 和 {step2} 接收，之间没有发送"
+              f"（可用 rerun(net, {master_seed}, {run_index}) 重现）")
+    if result.violations:
+        run_index = result.violations[0][0]
+        reproducible = check_rerun(net, master_seed, run_index, max_steps)
+        print(f"运行 {run_index} 在新的解释器中{'可以' if reproducible else '无法'}精确重现")
+
+
+if __name__ == "__main__":
+    main()
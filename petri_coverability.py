@@ -0,0 +1,208 @@
+import math
+
+import numpy as np
+
+from petri_matrix import CompiledPetriNet
+
+OMEGA = np.iinfo(np.int64).max  # ω：标记中表示"可以任意大"的值
+
+
+class _CoverIndex:
+    """
+    已加入的节点标记的覆盖索引
+
+    标记按 ω 位置的集合（位掩码）分组，每组是一个按行追加的 int64 矩阵。
+    m 被某个标记覆盖时，那个标记的 ω 位置一定包含 m 的 ω 位置，
+    所以查询只需要扫描掩码是 m 掩码超集的组，每组一次向量化比较。
+    """
+
+    def __init__(self, n_places):
+        self.n_places = n_places
+        self.groups = {}  # ω掩码 -> [矩阵, 行数, 节点编号列表]
+
+    def add(self, mask, marking, node):
+        group = self.groups.get(mask)
+        if group is None:
+            group = self.groups[mask] = [np.empty((16, self.n_places), dtype=np.int64), 0, []]
+        rows, count = group[0], group[1]
+        if count == len(rows):
+            rows = group[0] = np.concatenate([rows, np.empty_like(rows)])
+        rows[count] = marking
+        group[1] = count + 1
+        group[2].append(node)
+
+    def covering(self, mask, marking):
+        """返回覆盖 marking（每个位置都不小于它）的一个节点编号，没有时返回 None"""
+        for group_mask, (rows, count, nodes) in self.groups.items():
+            if group_mask & mask != mask:
+                continue
+            hits = np.flatnonzero(np.all(rows[:count] >= marking, axis=1))
+            if len(hits):
+                return nodes[hits[0]]
+        return None
+
+
+class CoverabilityResult:
+    """Karp–Miller 覆盖图及由它得到的有界性结论"""
+
+    def __init__(self, net, markings, edges, complete):
+        self.net = net
+        self.markings = markings  # 节点编号 -> 标记向量，OMEGA 表示 ω
+        self.edges = edges        # (源节点, 转换下标, 目标节点)，目标节点等于或覆盖该后继
+        self.complete = complete  # 是否在节点数上限内构建完毕
+
+    @property
+    def nodes(self):
+        return len(self.markings)
+
+    def bounds(self):
+        """每个位置的上界（标记数的最大值），无界的位置为 math.inf"""
+        if not self.markings:
+            return {}
+        bounds = np.max(self.markings, axis=0)
+        return {place: math.inf if bounds[i] == OMEGA else int(bounds[i])
+                for i, place in enumerate(self.net.places)}
+
+    def unbounded_places(self):
+        return [place for place, bound in self.bounds().items() if bound == math.inf]
+
+    @property
+    def bounded(self):
+        """网络是否有界；只有构建完毕时才能断定有界"""
+        if self.unbounded_places():
+            return False
+        return True if self.complete else None
+
+    def dead_transitions(self):
+        """在所有可达标记中都不会启用的转换名称（构建完毕时有效）"""
+        fired = {t for _, t, _ in self.edges}
+        return [name for t, name in enumerate(self.net.transitions) if t not in fired]
+
+    def coverable(self, target):
+        """是否存在一个可达标记覆盖 target（{位置名称: 标记数}），即每个位置都不少于给定数量"""
+        index = self.net.place_index
+        columns = [index[p] for p in target]
+        needed = np.array([target[p] for p in target], dtype=np.int64)
+        if not self.markings:
+            return False
+        return bool(np.any(np.all(np.asarray(self.markings)[:, columns] >= needed, axis=1)))
+
+    def format_marking(self, node):
+        marking = self.markings[node]
+        return "(" + ", ".join(
+            f"{place}={'ω' if marking[i] == OMEGA else int(marking[i])}"
+            for i, place in enumerate(self.net.places)) + ")"
+
+
+class CoverabilityAnalyzer:
+    """
+    用 Karp–Miller 算法构建覆盖图，回答有界性和各位置的上界
+
+    从初始标记开始按深度优先扩展。新标记 m' 如果大于等于它的某个祖先 m''（且不相等），
+    那么重复 m'' 到 m' 的触发序列可以让严格增大的位置任意大，这些位置加速为 ω。
+    ω 位置在触发时保持 ω。新标记如果已经被某个节点覆盖（包括相等），就不再扩展，
+    只加一条指向那个节点的边；覆盖检查使用按 ω 掩码分组的 _CoverIndex。
+    得到的节点集合覆盖所有可达标记，所以有界的位置上界就是节点中的最大值，
+    某个位置出现 ω 当且仅当它无界。
+    """
+
+    def __init__(self, net):
+        if not isinstance(net, CompiledPetriNet):
+            net = CompiledPetriNet.from_petri_net(net)
+        self.net = net
+
+    def _fire(self, marking, transition):
+        net = self.net
+        start, end = net.delta_offsets[transition], net.delta_offsets[transition + 1]
+        places = net.delta_places[start:end]
+        result = marking.copy()
+        finite = result[places] != OMEGA
+        result[places[finite]] += net.delta_values[start:end][finite]
+        return result
+
+    def explore(self, max_nodes=None):
+        """
+        构建覆盖图
+
+        参数:
+            max_nodes: 节点数上限，None 表示不限制（Karp–Miller 算法总会终止）
+        返回:
+            CoverabilityResult
+        """
+        net = self.net
+        index = _CoverIndex(net.n_places)
+        markings = []
+        parents = []
+        edges = []
+        complete = True
+
+        def add(marking, parent):
+            node = len(markings)
+            markings.append(marking)
+            parents.append(parent)
+            index.add(self._mask(marking), marking, node)
+            return node
+
+        stack = [add(net.initial_marking.copy(), -1)]
+        while stack:
+            node = stack.pop()
+            marking = markings[node]
+            for transition in net.enabled(marking):
+                transition = int(transition)
+                new = self._fire(marking, transition)
+                self._accelerate(new, node, markings, parents)
+                covering = index.covering(self._mask(new), new)
+                if covering is not None:
+                    edges.append((node, transition, covering))
+                    continue
+                if max_nodes and len(markings) >= max_nodes:
+                    complete = False
+                    continue
+                child = add(new, node)
+                edges.append((node, transition, child))
+                stack.append(child)
+        return CoverabilityResult(net, markings, edges, complete)
+
+    @staticmethod
+    def _mask(marking):
+        """ω 位置的位掩码"""
+        return sum(1 << int(p) for p in np.flatnonzero(marking == OMEGA))
+
+    @staticmethod
+    def _accelerate(marking, node, markings, parents):
+        """沿祖先链把严格增大的位置置为 ω（原地修改 marking）"""
+        while node >= 0:
+            ancestor = markings[node]
+            if np.all(ancestor <= marking):
+                marking[ancestor < marking] = OMEGA
+            node = parents[node]
+
+
+def analyze_coverability(net, max_nodes=None):
+    """构建 Karp–Miller 覆盖图，net 可以是 PetriNet 或 CompiledPetriNet"""
+    return CoverabilityAnalyzer(net).explore(max_nodes)
+
+
+def main():
+    from Petri_simulation import parse_input
+
+    print("Petri网络覆盖性分析")
+    print("读取网络配置...")
+    result = analyze_coverability(parse_input())
+    print(f"覆盖图共有 {result.nodes} 个节点，{len(result.edges)} 条边")
+    print("\n各位置的上界:")
+    for place, bound in result.bounds().items():
+        print(f"  {place}: {'无界 (ω)' if bound == math.inf else bound}")
+    if result.bounded:
+        print("\n网络是有界的。")
+    elif result.bounded is None:
+        print("\n超出节点数上限，覆盖图未完成，尚未发现无界的位置。")
+    else:
+        print("\n网络是无界的，无界的位置: " + ", ".join(result.unbounded_places()))
+    dead = result.dead_transitions()
+    if dead:
+        print("永远不会启用的转换: " + ", ".join(dead))
+
+
+if __name__ == "__main__":
+    main()
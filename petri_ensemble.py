@@ -0,0 +1,170 @@
+import math
+
+import numpy as np
+
+from petri_matrix import CompiledPetriNet, SEND, RECEIVE
+
+
+def wilson_interval(successes, n, z=1.96):
+    """二项分布比例的 Wilson 置信区间，返回 (下界, 上界)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class EnsembleResult:
+    """一组独立运行的结果，每个数组按运行编号排列，-1 表示没有发生"""
+
+    def __init__(self, hosts, max_steps, violation_steps, previous_steps, violation_hosts,
+                 deadlock_steps):
+        self.hosts = hosts
+        self.max_steps = max_steps
+        self.violation_steps = violation_steps  # 发现违规的步骤（第二次接收）
+        self.previous_steps = previous_steps    # 对应的上一次接收的步骤
+        self.violation_hosts = violation_hosts  # 违规主机在 hosts 中的下标
+        self.deadlock_steps = deadlock_steps    # 没有可启用转换而停止的步骤
+
+    @property
+    def runs(self):
+        return len(self.violation_steps)
+
+    def probability(self, z=1.96):
+        """max_steps 步之内发现违规的概率估计，返回 (估计值, 下界, 上界)"""
+        hits = int(np.count_nonzero(self.violation_steps >= 0))
+        low, high = wilson_interval(hits, self.runs, z)
+        return hits / self.runs if self.runs else 0.0, low, high
+
+    def step_distribution(self):
+        """发现违规的步骤分布：长度为 max_steps 的数组，下标为步骤，值为运行数"""
+        steps = self.violation_steps[self.violation_steps >= 0]
+        return np.bincount(steps, minlength=self.max_steps)
+
+    def host_counts(self):
+        """每个主机发生违规的运行数"""
+        hosts = self.violation_hosts[self.violation_steps >= 0]
+        counts = np.bincount(hosts, minlength=len(self.hosts))
+        return {host: int(counts[i]) for i, host in enumerate(self.hosts)}
+
+    def summary(self, z=1.96):
+        p, low, high = self.probability(z)
+        steps = self.violation_steps[self.violation_steps >= 0]
+        return {
+            'runs': self.runs,
+            'max_steps': self.max_steps,
+            'violations': int(len(steps)),
+            'probability': p,
+            'ci_low': low,
+            'ci_high': high,
+            'deadlocks': int(np.count_nonzero(self.deadlock_steps >= 0)),
+            'mean_violation_step': float(steps.mean()) if len(steps) else None,
+            'hosts': self.host_counts(),
+        }
+
+
+def run_ensemble(net, runs=1000, max_steps=1000, seed=None, rng=None):
+    """
+    同时推进大量独立的随机运行
+
+    标记保存在 (运行数 × 位置数) 的矩阵中。每一步对所有仍在运行的行：
+      1. 一次比较所有输入弧得到 (运行 × 转换) 的启用矩阵
+      2. 在每行的启用转换中均匀随机选一个（与 random.choice 的分布相同）
+      3. 从 CSR 形式的变化量数组中取出所选转换的 (位置, 变化量) 更新标记
+      4. 按 ViolationMonitor 的规则向量化地更新发送计数和每个主机上一次接收时的发送计数
+    运行在发现违规或没有可启用转换时停止，与 Petri_simulation.simulate 一致。
+
+    参数:
+        net: CompiledPetriNet，或者可以用 CompiledPetriNet.from_petri_net 编译的 PetriNet
+        runs: 运行数
+        max_steps: 每个运行的最大步数
+        seed / rng: 随机种子或 numpy.random.Generator，结果可以复现
+    """
+    if not isinstance(net, CompiledPetriNet):
+        net = CompiledPetriNet.from_petri_net(net)
+    rng = np.random.default_rng(seed) if rng is None else rng
+    n_transitions = net.n_transitions
+    n_hosts = len(net.hosts)
+    delta_lengths = np.diff(net.delta_offsets)
+
+    markings = np.tile(net.initial_marking, (runs, 1))
+    active = np.arange(runs)
+    send_count = np.zeros(runs, dtype=np.int64)
+    # 每个主机上一次接收时的发送计数和步骤，-1 表示还没有接收过
+    last_sends = np.full((runs, max(n_hosts, 1)), -1, dtype=np.int64)
+    last_steps = np.full((runs, max(n_hosts, 1)), -1, dtype=np.int64)
+
+    violation_steps = np.full(runs, -1, dtype=np.int64)
+    previous_steps = np.full(runs, -1, dtype=np.int64)
+    violation_hosts = np.full(runs, -1, dtype=np.int64)
+    deadlock_steps = np.full(runs, -1, dtype=np.int64)
+
+    for step in range(max_steps):
+        if len(active) == 0:
+            break
+        # 启用矩阵：统计每个 (运行, 转换) 不满足的输入弧数
+        short_rows, short_arcs = np.nonzero(markings[active][:, net.pre_places] < net.pre_weights)
+        blocked = np.bincount(short_rows * n_transitions + net.pre_transitions[short_arcs],
+                              minlength=len(active) * n_transitions)
+        enabled = blocked.reshape(len(active), n_transitions) == 0
+
+        counts = enabled.sum(axis=1)
+        dead = counts == 0
+        deadlock_steps[active[dead]] = step
+        active, enabled, counts = active[~dead], enabled[~dead], counts[~dead]
+        if len(active) == 0:
+            break
+
+        # 在每行的启用转换中均匀选择：取累计计数第一次超过随机下标的位置
+        picks = rng.integers(0, counts)
+        chosen = np.argmax(np.cumsum(enabled, axis=1) > picks[:, None], axis=1)
+        # 把每行所选转换在 CSR 中的区间展开为弧下标；同一转换中的位置互不相同，
+        # 所以 (运行, 位置) 不会重复，可以直接用高级索引累加
+        lengths = delta_lengths[chosen]
+        ends = np.cumsum(lengths)
+        arcs = np.arange(ends[-1]) + np.repeat(net.delta_offsets[chosen] - (ends - lengths), lengths)
+        markings[np.repeat(active, lengths), net.delta_places[arcs]] += net.delta_values[arcs]
+
+        event_types = net.event_types[chosen]
+        hosts = net.event_hosts[chosen]
+        send_count[active[event_types == SEND]] += 1
+        receiving = event_types == RECEIVE
+        rows, hosts = active[receiving], hosts[receiving]
+        if len(rows):
+            last = last_sends[rows, hosts]
+            violated = (last >= 0) & (last == send_count[rows])
+            violation_steps[rows[violated]] = step
+            previous_steps[rows[violated]] = last_steps[rows[violated], hosts[violated]]
+            violation_hosts[rows[violated]] = hosts[violated]
+            last_sends[rows, hosts] = send_count[rows]
+            last_steps[rows, hosts] = step
+            active = active[violation_steps[active] < 0]
+
+    return EnsembleResult(net.hosts, max_steps, violation_steps, previous_steps, violation_hosts,
+                          deadlock_steps)
+
+
+def main():
+    from Petri_simulation import parse_input
+
+    print("Petri网络蒙特卡罗模拟")
+    print("读取网络配置...")
+    net = CompiledPetriNet.from_petri_net(parse_input())
+    runs = int(input("运行次数: ") or 10000)
+    max_steps = int(input("每次运行的最大步数: ") or 1000)
+    result = run_ensemble(net, runs=runs, max_steps=max_steps)
+    summary = result.summary()
+    print(f"\n{summary['runs']} 次运行中有 {summary['violations']} 次发现违规，"
+          f"概率 {summary['probability']:.4f}（95% 置信区间 "
+          f"{summary['ci_low']:.4f} - {summary['ci_high']:.4f}）")
+    if summary['mean_violation_step'] is not None:
+        print(f"平均在第 {summary['mean_violation_step']:.1f} 步发现违规")
+    for host, count in summary['hosts'].items():
+        print(f"主机 {host}: {count} 次")
+    print(f"{summary['deadlocks']} 次运行因没有可启用的转换而停止")
+
+
+if __name__ == "__main__":
+    main()
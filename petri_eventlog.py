@@ -0,0 +1,246 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from petri_matrix import NO_EVENT, SEND, RECEIVE, EVENT_CODES
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 65536  # 每个缓冲块的记录数，写满后一次写入磁盘
+
+# 列名 -> (array 类型码, numpy dtype)，每列一个文件，记录按写入顺序排列
+COLUMNS = {
+    'step': ('q', np.int64),        # 触发时的步骤
+    'transition': ('i', np.int32),  # 转换编号，对应 transitions 中的名称
+    'event': ('b', np.int8),        # 事件类型编码：NO_EVENT / SEND / RECEIVE
+    'host': ('i', np.int32),        # 主机编号，对应 hosts 中的名称，-1 表示没有主机
+}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+
+def _column_path(path, column):
+    return os.path.join(path, column + '.bin')
+
+
+def _meta_path(path):
+    return os.path.join(path, 'meta.json')
+
+
+class EventLogWriter:
+    """
+    把转换触发事件写成按列存储的二进制日志
+
+    日志是一个目录：每列一个定长记录的文件（见 COLUMNS），meta.json 保存转换和主机的名称表。
+    记录先追加到每列的 array 缓冲区，满 chunk_size 条后每列写入一个块，
+    所以无论运行多少步，写入端占用的内存都是常数。
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, append=False):
+        if chunk_size < 1:
+            raise ValueError("块大小必须大于0")
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        self.transitions = []
+        self.hosts = []
+        if append and os.path.exists(_meta_path(path)):
+            with open(_meta_path(path), encoding='utf-8') as f:
+                meta = json.load(f)
+            self.transitions = meta['transitions']
+            self.hosts = meta['hosts']
+        self.transition_ids = {name: i for i, name in enumerate(self.transitions)}
+        self.host_ids = {name: i for i, name in enumerate(self.hosts)}
+        mode = 'ab' if append else 'wb'
+        self.files = {column: open(_column_path(path, column), mode) for column in COLUMNS}
+        self.buffers = {column: array(code) for column, (code, _) in COLUMNS.items()}
+        self.count = 0
+        self.names_changed = True
+        self._write_meta()
+
+    def append(self, step, transition, event_type=None, host=None):
+        """追加一条记录，transition 和 host 是名称，event_type 是 'send' / 'receive' / None"""
+        transition_id = self.transition_ids.get(transition)
+        if transition_id is None:
+            transition_id = self.transition_ids[transition] = len(self.transitions)
+            self.transitions.append(transition)
+            self.names_changed = True
+        if host is None:
+            host_id = -1
+        else:
+            host_id = self.host_ids.get(host)
+            if host_id is None:
+                host_id = self.host_ids[host] = len(self.hosts)
+                self.hosts.append(host)
+                self.names_changed = True
+        buffers = self.buffers
+        buffers['step'].append(step)
+        buffers['transition'].append(transition_id)
+        buffers['event'].append(EVENT_CODES.get(event_type, NO_EVENT))
+        buffers['host'].append(host_id)
+        self.count += 1
+        if len(buffers['step']) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的记录作为一个块写入每列的文件"""
+        # 先更新名称表，读取端看到的记录引用的名称总是已经存在
+        self._write_meta()
+        for column, buffer in self.buffers.items():
+            if buffer:
+                self.files[column].write(buffer)
+                del buffer[:]
+            self.files[column].flush()
+
+    def _write_meta(self):
+        # 名称表只在新增名称后重写；先写临时文件再替换，读取端不会看到写了一半的文件
+        if not self.names_changed:
+            return
+        meta = {
+            'version': FORMAT_VERSION,
+            'columns': {column: np.dtype(dtype).str for column, (_, dtype) in COLUMNS.items()},
+            'transitions': self.transitions,
+            'hosts': self.hosts,
+        }
+        temp = _meta_path(self.path) + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp, _meta_path(self.path))
+        self.names_changed = False
+
+    def close(self):
+        if self.files:
+            self.flush()
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventLogReader:
+    """
+    内存映射地读取 EventLogWriter 写的日志
+
+    每列是一个 numpy.memmap，按需从磁盘分页读取，可以直接做向量化的筛选和统计。
+    记录数取各列文件中完整记录数的最小值，所以也可以读取仍在写入的日志。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(_meta_path(path), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"不支持的事件日志版本: {meta.get('version')}")
+        self.transitions = meta['transitions']
+        self.hosts = meta['hosts']
+        sizes = {column: os.path.getsize(_column_path(path, column)) // np.dtype(dtype).itemsize
+                 for column, (_, dtype) in COLUMNS.items()}
+        self.count = min(sizes.values())
+        self.columns = {}
+        for column, (_, dtype) in COLUMNS.items():
+            if self.count == 0:
+                self.columns[column] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[column] = np.memmap(_column_path(path, column), dtype=dtype, mode='r',
+                                                 shape=(self.count,))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def step(self):
+        return self.columns['step']
+
+    @property
+    def transition(self):
+        return self.columns['transition']
+
+    @property
+    def event(self):
+        return self.columns['event']
+
+    @property
+    def host(self):
+        return self.columns['host']
+
+    def chunks(self, chunk_size=CHUNK_SIZE):
+        """按块遍历记录，每块是 {列名: 数组切片}，适合分块处理超出内存的日志"""
+        for start in range(0, self.count, chunk_size):
+            yield {column: values[start:start + chunk_size] for column, values in self.columns.items()}
+
+    def events(self, start=0, stop=None):
+        """
+        解码 [start, stop) 中的发送和接收事件，
+        产生与 PetriNet.events 相同的 (步骤, 事件类型, 主机) 元组
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        for chunk_start in range(start, stop, CHUNK_SIZE):
+            chunk_stop = min(chunk_start + CHUNK_SIZE, stop)
+            events = self.event[chunk_start:chunk_stop]
+            rows = np.flatnonzero(events != NO_EVENT) + chunk_start
+            for step, event, host in zip(self.step[rows].tolist(), self.event[rows].tolist(),
+                                         self.host[rows].tolist()):
+                yield step, EVENT_NAMES[event], self.hosts[host]
+
+    def host_events(self, host):
+        """某个主机的 (步骤, 事件类型) 列表，与 PetriNet.host_events[host] 相同"""
+        host_id = self.hosts.index(host)
+        result = []
+        for chunk in self.chunks():
+            rows = np.flatnonzero((chunk['host'] == host_id) & (chunk['event'] != NO_EVENT))
+            result.extend(zip(chunk['step'][rows].tolist(),
+                              [EVENT_NAMES[e] for e in chunk['event'][rows].tolist()]))
+        return result
+
+    def counts(self):
+        """统计每个转换的触发次数和每个主机的发送、接收次数"""
+        transitions = np.zeros(len(self.transitions), dtype=np.int64)
+        sends = np.zeros(len(self.hosts), dtype=np.int64)
+        receives = np.zeros(len(self.hosts), dtype=np.int64)
+        for chunk in self.chunks():
+            transitions += np.bincount(chunk['transition'], minlength=len(self.transitions))
+            for code, counts in ((SEND, sends), (RECEIVE, receives)):
+                hosts = chunk['host'][(chunk['event'] == code) & (chunk['host'] >= 0)]
+                counts += np.bincount(hosts, minlength=len(self.hosts))
+        return {
+            'events': self.count,
+            'transitions': dict(zip(self.transitions, transitions.tolist())),
+            'sends': dict(zip(self.hosts, sends.tolist())),
+            'receives': dict(zip(self.hosts, receives.tolist())),
+        }
+
+    def replay(self, monitor=None):
+        """把日志中的事件依次交给 ViolationMonitor，返回监视器"""
+        if monitor is None:
+            from Petri_simulation import ViolationMonitor
+            monitor = ViolationMonitor()
+        for step, event_type, host in self.events():
+            monitor.observe(step, event_type, host)
+        return monitor
+
+
+def main():
+    from Petri_simulation import parse_input, simulate
+
+    print("Petri网络模拟（事件写入磁盘日志）")
+    print("读取网络配置...")
+    net = parse_input()
+    path = input("日志目录: ").strip() or "petri_events"
+    max_steps = int(input("最大步数: ") or 1000)
+    with EventLogWriter(path) as log:
+        net.event_log = log
+        simulate(net, max_steps)
+    reader = EventLogReader(path)
+    counts = reader.counts()
+    print(f"\n日志 {path} 中共有 {counts['events']} 条记录")
+    for host in reader.hosts:
+        print(f"主机 {host}: 发送 {counts['sends'][host]} 次，接收 {counts['receives'][host]} 次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import numpy as np
+
+# 转换的事件类型编码
+NO_EVENT, SEND, RECEIVE = 0, 1, 2
+EVENT_CODES = {None: NO_EVENT, 'send': SEND, 'receive': RECEIVE}
+
+
+def _csr(rows, n_rows, columns, values):
+    """把 (行, 列, 值) 三元组按行整理为 CSR 形式的 (偏移, 列, 值) 数组"""
+    rows = np.asarray(rows, dtype=np.int64)
+    order = np.argsort(rows, kind='stable')
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return (offsets,
+            np.asarray(columns, dtype=np.int64)[order],
+            np.asarray(values, dtype=np.int64)[order])
+
+
+class CompiledPetriNet:
+    """
+    编译后的Petri网：位置和转换映射为整数下标，标记是 int64 向量
+
+    弧保存为按转换排列的稀疏列表（CSR），同时可以取得稠密的 Pre/Post 关联矩阵：
+        pre[t, p]  触发转换 t 时从位置 p 消耗的标记数
+        post[t, p] 触发转换 t 时向位置 p 产生的标记数
+    所有转换的启用判断是一次向量化比较，触发是一次向量加法。
+    """
+
+    def __init__(self, places, marking, transitions, arcs, event_types=None, hosts=None):
+        """
+        参数:
+            places: 位置名称列表
+            marking: 与 places 对应的初始标记数
+            transitions: 转换名称列表
+            arcs: (转换名称, 位置名称, 消耗数, 产生数) 列表，同一对可以出现多次，权重累加
+            event_types: 转换名称 -> 'send' / 'receive' / None
+            hosts: 转换名称 -> 主机名称或 None
+        """
+        self.places = list(places)
+        self.transitions = list(transitions)
+        self.place_index = {p: i for i, p in enumerate(self.places)}
+        self.transition_index = {t: i for i, t in enumerate(self.transitions)}
+        self.initial_marking = np.asarray(marking, dtype=np.int64).copy()
+        self.marking = self.initial_marking.copy()
+
+        weights = {}
+        for transition, place, consume, produce in arcs:
+            key = (self.transition_index[transition], self.place_index[place])
+            old_consume, old_produce = weights.get(key, (0, 0))
+            weights[key] = (old_consume + consume, old_produce + produce)
+        keys = sorted(weights)
+        n = len(self.transitions)
+        t_ids = [t for t, _ in keys]
+        p_ids = [p for _, p in keys]
+        consume = [weights[k][0] for k in keys]
+        delta = [weights[k][1] - weights[k][0] for k in keys]
+        inputs = [i for i, c in enumerate(consume) if c > 0]
+
+        # 输入弧：启用判断只需要消耗数大于0的弧
+        self.pre_offsets, self.pre_places, self.pre_weights = _csr(
+            [t_ids[i] for i in inputs], n, [p_ids[i] for i in inputs], [consume[i] for i in inputs])
+        self.pre_transitions = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.pre_offsets))
+        # 触发时的标记变化量（产生数减消耗数），同一转换中的位置互不相同
+        self.delta_offsets, self.delta_places, self.delta_values = _csr(t_ids, n, p_ids, delta)
+        self._arcs = [(t, p, c, d + c) for t, p, c, d in zip(t_ids, p_ids, consume, delta)]
+        self._pre = self._post = None
+
+        event_types = event_types or {}
+        hosts = hosts or {}
+        self.hosts = sorted({h for h in hosts.values() if h is not None})
+        host_index = {h: i for i, h in enumerate(self.hosts)}
+        # 发送、接收以外的事件类型（如 ack）不参与违规检测，按 NO_EVENT 处理
+        self.event_types = np.array([EVENT_CODES.get(event_types.get(t), NO_EVENT)
+                                     for t in self.transitions], dtype=np.int8)
+        self.event_hosts = np.array([host_index.get(hosts.get(t), -1) for t in self.transitions],
+                                    dtype=np.int64)
+
+    @property
+    def n_places(self):
+        return len(self.places)
+
+    @property
+    def n_transitions(self):
+        return len(self.transitions)
+
+    def _dense(self):
+        pre = np.zeros((self.n_transitions, self.n_places), dtype=np.int64)
+        post = np.zeros_like(pre)
+        for t, p, consume, produce in self._arcs:
+            pre[t, p] = consume
+            post[t, p] = produce
+        self._pre, self._post = pre, post
+
+    @property
+    def pre(self):
+        """稠密的 Pre 矩阵（转换 × 位置），第一次访问时构建"""
+        if self._pre is None:
+            self._dense()
+        return self._pre
+
+    @property
+    def post(self):
+        """稠密的 Post 矩阵（转换 × 位置），第一次访问时构建"""
+        if self._post is None:
+            self._dense()
+        return self._post
+
+    @property
+    def incidence(self):
+        """关联矩阵 C = Post - Pre"""
+        return self.post - self.pre
+
+    def enabled_mask(self, marking=None):
+        """所有转换是否启用的布尔向量：一次比较所有输入弧，再按转换统计不满足的弧"""
+        marking = self.marking if marking is None else marking
+        short = marking[self.pre_places] < self.pre_weights
+        return np.bincount(self.pre_transitions[short], minlength=self.n_transitions) == 0
+
+    def enabled(self, marking=None):
+        """启用的转换下标数组"""
+        return np.flatnonzero(self.enabled_mask(marking))
+
+    def is_enabled(self, transition, marking=None):
+        """只检查一个转换的输入弧"""
+        marking = self.marking if marking is None else marking
+        start, end = self.pre_offsets[transition], self.pre_offsets[transition + 1]
+        return bool(np.all(marking[self.pre_places[start:end]] >= self.pre_weights[start:end]))
+
+    def fire(self, transition):
+        """触发转换（下标），未启用时返回 False"""
+        if not self.is_enabled(transition):
+            return False
+        start, end = self.delta_offsets[transition], self.delta_offsets[transition + 1]
+        self.marking[self.delta_places[start:end]] += self.delta_values[start:end]
+        return True
+
+    def random_step(self, rng=None):
+        """随机触发一个启用的转换，返回其下标；没有启用的转换时返回 None"""
+        enabled = self.enabled()
+        if len(enabled) == 0:
+            return None
+        rng = np.random.default_rng() if rng is None else rng
+        transition = int(enabled[rng.integers(len(enabled))])
+        self.fire(transition)
+        return transition
+
+    def reset(self):
+        """恢复初始标记"""
+        self.marking = self.initial_marking.copy()
+
+    def marking_dict(self, marking=None):
+        """把标记向量转换回 {位置名称: 标记数}"""
+        marking = self.marking if marking is None else marking
+        return {place: int(marking[i]) for i, place in enumerate(self.places)}
+
+    @classmethod
+    def from_petri_net(cls, net):
+        """从 Petri_simulation.PetriNet（及其 parse_input 的输入格式）编译"""
+        weights = getattr(net, 'arc_weights', {})
+        arcs = []
+        for t in net.transitions:
+            for place in net.input_arcs[t]:
+                arcs.append((t, place, weights.get((place, t), 1), 0))
+            for place in net.output_arcs[t]:
+                arcs.append((t, place, 0, weights.get((t, place), 1)))
+        event_types = {}
+        hosts = {}
+        for t, info in net.transitions.items():
+            # 与 fire_transition 一致：只有同时给出事件类型和主机的转换才记录事件
+            if info["event_type"] and info["host"]:
+                event_types[t] = info["event_type"]
+                hosts[t] = info["host"]
+        places = list(net.places)
+        return cls(places, [net.tokens[p] for p in places], list(net.transitions), arcs,
+                   event_types, hosts)
+
+    @classmethod
+    def from_simulator(cls, simulator):
+        """
+        从 petri_sim2 copy.py 的 PetriNetSimulator 编译
+
+        只依赖 places（位置 -> 标记数）和 transitions（名称 -> {'inputs', 'outputs'}），
+        事件类型和主机按 check_conditions 的规则从转换名称推断。
+        """
+        places = list(simulator.places)
+        for rule in simulator.transitions.values():
+            for place in list(rule['inputs']) + list(rule['outputs']):
+                if place not in simulator.places and place not in places:
+                    places.append(place)
+        arcs = []
+        event_types = {}
+        hosts = {}
+        for name, rule in simulator.transitions.items():
+            for place, tokens in rule['inputs'].items():
+                arcs.append((name, place, tokens, 0))
+            for place, tokens in rule['outputs'].items():
+                arcs.append((name, place, 0, tokens))
+            lowered = name.lower()
+            if "receive" in lowered:
+                event_types[name], hosts[name] = 'receive', name.split('_')[-1]
+            elif "send" in lowered:
+                event_types[name], hosts[name] = 'send', name.split('_')[-1]
+        marking = [simulator.places.get(p, 0) for p in places]
+        return cls(places, marking, list(simulator.transitions), arcs, event_types, hosts)
@@ -0,0 +1,550 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from array import array
+
+import numpy as np
+
+from petri_matrix import CompiledPetriNet, SEND, RECEIVE
+from Petri_simulation import ViolationMonitor
+
+FRONTIER_SHARE = 16  # 当前层最多占用内存预算的 1/16，超过后转存到磁盘
+PARENT_SHARE = 16    # 父指针最多占用内存预算的 1/16，超过后转存到磁盘
+CACHE_SHARE = 16     # 磁盘上已访问状态数据库的页缓存占内存预算的 1/16
+
+
+class TokenOverflowError(ValueError):
+    """标记数超过状态键 dtype 的范围，网络可能是无界的"""
+
+
+class _Frontier:
+    """
+    BFS 的一层待扩展状态
+
+    状态较少时保存在列表中；超过内存上限后整层转存到临时文件，
+    每条记录是定长的 (状态编号 int64, 状态键)，读取时顺序扫描。
+    """
+
+    def __init__(self, key_size, limit_bytes, spill_dir=None):
+        self.record_size = 8 + key_size
+        self.limit = max(1, limit_bytes // (self.record_size + 64))
+        self.spill_dir = spill_dir
+        self.items = []
+        self.file = None
+        self.count = 0
+
+    def append(self, index, key):
+        self.count += 1
+        if self.file is None:
+            self.items.append((index, key))
+            if len(self.items) > self.limit:
+                self.file = tempfile.TemporaryFile(dir=self.spill_dir)
+                for item in self.items:
+                    self._write(*item)
+                self.items = []
+        else:
+            self._write(index, key)
+
+    def _write(self, index, key):
+        self.file.write(index.to_bytes(8, 'little') + key)
+
+    @property
+    def spilled(self):
+        return self.file is not None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if self.file is None:
+            yield from self.items
+            return
+        self.file.seek(0)
+        size = self.record_size
+        while True:
+            chunk = self.file.read(size * 4096)
+            if not chunk:
+                break
+            for offset in range(0, len(chunk), size):
+                yield (int.from_bytes(chunk[offset:offset + 8], 'little'),
+                       chunk[offset + 8:offset + size])
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class _VisitedSet:
+    """
+    已访问状态的集合
+
+    状态较少时是内存中的 set；超过上限后把内存中的状态按键排序批量写入临时目录下的
+    SQLite 数据库（以状态键为主键的B树），清空内存后继续。查询时先查内存再查数据库，
+    所以状态空间大于内存预算时搜索仍然可以完成，只是变慢。
+    """
+
+    def __init__(self, limit, cache_bytes, spill_dir=None):
+        self.limit = max(1, limit)
+        self.cache_bytes = cache_bytes
+        self.spill_dir = spill_dir
+        self.memory = set()
+        self.spilled = 0      # 已经写入磁盘的状态数
+        self.directory = None
+        self.db = None
+
+    def add(self, key):
+        self.memory.add(key)
+        if len(self.memory) > self.limit:
+            self._spill()
+
+    def __contains__(self, key):
+        if key in self.memory:
+            return True
+        return self.db is not None and self.db.execute(
+            'SELECT 1 FROM visited WHERE key = ?', (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.spilled + len(self.memory)
+
+    def _spill(self):
+        if self.db is None:
+            self.directory = tempfile.TemporaryDirectory(dir=self.spill_dir)
+            self.db = sqlite3.connect(os.path.join(self.directory.name, 'visited.db'))
+            # 临时数据库不需要崩溃恢复
+            self.db.execute('PRAGMA journal_mode = OFF')
+            self.db.execute('PRAGMA synchronous = OFF')
+            self.db.execute(f'PRAGMA cache_size = {-max(1, self.cache_bytes // 1024)}')
+            self.db.execute('CREATE TABLE visited (key BLOB PRIMARY KEY) WITHOUT ROWID')
+        self.db.executemany('INSERT OR IGNORE INTO visited VALUES (?)',
+                            ((key,) for key in sorted(self.memory)))
+        self.db.commit()
+        self.spilled += len(self.memory)
+        self.memory = set()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            self.directory.cleanup()
+
+
+class _ParentLog:
+    """
+    状态编号 -> (父状态编号, 到达该状态触发的转换)
+
+    最近的记录保存在 array 中，超过上限后追加到两个定长记录的临时文件，
+    回溯路径时按编号定位读取。
+    """
+
+    def __init__(self, limit, spill_dir=None):
+        self.limit = max(1, limit)
+        self.spill_dir = spill_dir
+        self.parents = array('q')
+        self.via = array('i')
+        self.base = 0         # 已经写入文件的记录数
+        self.files = None
+
+    def append(self, parent, transition):
+        self.parents.append(parent)
+        self.via.append(transition)
+        if len(self.parents) > self.limit:
+            if self.files is None:
+                self.files = (tempfile.TemporaryFile(dir=self.spill_dir),
+                              tempfile.TemporaryFile(dir=self.spill_dir))
+            for f, values in zip(self.files, (self.parents, self.via)):
+                f.seek(0, os.SEEK_END)
+                f.write(values)
+            self.base += len(self.parents)
+            self.parents = array('q')
+            self.via = array('i')
+
+    def __len__(self):
+        return self.base + len(self.parents)
+
+    def get(self, index):
+        if index >= self.base:
+            return self.parents[index - self.base], self.via[index - self.base]
+        record = []
+        for f, code in zip(self.files, 'qi'):
+            value = array(code)
+            f.seek(index * value.itemsize)
+            value.frombytes(f.read(value.itemsize))
+            record.append(value[0])
+        return tuple(record)
+
+    def close(self):
+        if self.files is not None:
+            for f in self.files:
+                f.close()
+            self.files = None
+
+
+class ReachabilityResult:
+    """状态空间搜索的结果"""
+
+    def __init__(self, net, states, edges, deadlocks, complete, trace=None, violation=None,
+                 spilled_levels=0, spilled_states=0, unbounded=False):
+        self.states = states            # 访问过的 (标记, 监视器状态) 数
+        self.edges = edges              # 探索过的转换触发次数
+        self.deadlocks = deadlocks      # 没有可启用转换的状态数
+        self.complete = complete        # 是否在状态数上限内搜索完毕
+        self.trace = trace              # 最短违规路径上的转换名称列表
+        self.violation = violation      # (主机, 上一次接收步骤, 本次接收步骤)
+        self.spilled_levels = spilled_levels  # 转存到磁盘的BFS层数
+        self.spilled_states = spilled_states  # 转存到磁盘的已访问状态数
+        self.unbounded = unbounded      # 是否因标记数超过 dtype 的范围而停止（网络可能是无界的）
+        self.net = net
+
+    @property
+    def found(self):
+        return self.violation is not None
+
+
+class ReachabilityExplorer:
+    """
+    Petri网可达图的广度优先搜索，同时跟踪"两次接收之间没有发送"的监视器状态
+
+    监视器状态是一个主机位掩码：第 h 位表示主机 h 已经接收过，且之后还没有任何发送。
+    发送清空掩码；主机 h 接收时如果第 h 位已经置位，就是一次违规。
+    搜索的状态是 (标记, 掩码)，打包成定长 bytes 放在哈希表中判重：
+        标记按 dtype 压缩（默认 uint16），掩码占 ceil(主机数 / 8) 字节
+    因为是按层的BFS，第一次发现的违规路径就是最短的。
+
+    内存预算覆盖已访问状态、父指针和当前层，超出各自的份额后都转存到 spill_dir 下的临时文件：
+    当前层（1/FRONTIER_SHARE）写成定长记录，父指针（1/PARENT_SHARE）写成定长数组，
+    已访问状态（其余部分）批量写入磁盘上的 SQLite 数据库。因此有限的状态空间总能搜索完毕，
+    只有达到 max_states 或者标记数超过 dtype 的范围时结果才会标记为不完整；
+    后一种情况 unbounded 为 True，网络可能是无界的，可以用 petri_coverability 判断。
+    """
+
+    def __init__(self, net, memory_budget=256 * 1024 * 1024, dtype=np.uint16, spill_dir=None):
+        if not isinstance(net, CompiledPetriNet):
+            net = CompiledPetriNet.from_petri_net(net)
+        self.net = net
+        self.memory_budget = memory_budget
+        self.dtype = np.dtype(dtype)
+        self.max_tokens = np.iinfo(self.dtype).max
+        self.spill_dir = spill_dir
+        self.mask_size = max(1, (len(net.hosts) + 7) // 8)
+        self.key_size = net.n_places * self.dtype.itemsize + self.mask_size
+
+    def pack(self, marking, mask):
+        """把 (标记, 掩码) 打包成定长 bytes"""
+        if marking.max(initial=0) > self.max_tokens:
+            raise TokenOverflowError(f"标记数超过 {self.dtype} 的范围，网络可能是无界的，可以换用更大的 dtype")
+        return marking.astype(self.dtype).tobytes() + mask.to_bytes(self.mask_size, 'little')
+
+    def unpack(self, key):
+        marking = np.frombuffer(key[:-self.mask_size], dtype=self.dtype).astype(np.int64)
+        return marking, int.from_bytes(key[-self.mask_size:], 'little')
+
+    def _fire(self, marking, transition):
+        net = self.net
+        start, end = net.delta_offsets[transition], net.delta_offsets[transition + 1]
+        result = marking.copy()
+        result[net.delta_places[start:end]] += net.delta_values[start:end]
+        return result
+
+    def _step(self, marking, mask, transition):
+        """触发转换后的状态键；如果这次触发构成违规，返回 None"""
+        new_mask = mask
+        event = self.net.event_types[transition]
+        if event == SEND:
+            new_mask = 0
+        elif event == RECEIVE:
+            bit = 1 << int(self.net.event_hosts[transition])
+            if mask & bit:
+                return None
+            new_mask = mask | bit
+        return self.pack(self._fire(marking, transition), new_mask)
+
+    def _storage(self, key):
+        """创建按内存预算划分的已访问状态集合和父指针记录"""
+        budget = self.memory_budget
+        # 集合槽位和 bytes 对象的大致开销
+        entry_bytes = sys.getsizeof(key) + 8 * 2
+        visited_bytes = budget - budget // FRONTIER_SHARE - budget // PARENT_SHARE - budget // CACHE_SHARE
+        visited = _VisitedSet(visited_bytes // entry_bytes, budget // CACHE_SHARE, self.spill_dir)
+        parents = _ParentLog(budget // PARENT_SHARE // 12, self.spill_dir)
+        return visited, parents
+
+    def explore(self, max_states=None):
+        """
+        搜索可达状态空间，遇到第一个违规时停止
+
+        参数:
+            max_states: 访问状态数上限，None 表示不限制（超出内存预算的部分转存到磁盘）
+        返回:
+            ReachabilityResult
+        """
+        net = self.net
+        try:
+            root = self.pack(net.initial_marking, 0)
+        except TokenOverflowError:
+            return ReachabilityResult(net, 0, 0, 0, False, unbounded=True)
+        visited, parents = self._storage(root)
+        visited.add(root)
+        parents.append(-1, -1)
+        frontier = _Frontier(self.key_size, self.memory_budget // FRONTIER_SHARE, self.spill_dir)
+        frontier.append(0, root)
+        edges = deadlocks = spilled_levels = 0
+        complete = True
+
+        try:
+            while len(frontier):
+                spilled_levels += frontier.spilled
+                next_frontier = _Frontier(self.key_size, self.memory_budget // FRONTIER_SHARE, self.spill_dir)
+                for index, key in frontier:
+                    marking, mask = self.unpack(key)
+                    enabled = net.enabled(marking)
+                    if len(enabled) == 0:
+                        deadlocks += 1
+                        continue
+                    for transition in enabled:
+                        transition = int(transition)
+                        edges += 1
+                        new_key = self._step(marking, mask, transition)
+                        if new_key is None:
+                            trace = self._trace(parents, index) + [transition]
+                            return self._result(visited, edges, deadlocks, False,
+                                                trace, spilled_levels)
+                        if new_key in visited:
+                            continue
+                        if max_states and len(visited) >= max_states:
+                            complete = False
+                            continue
+                        visited.add(new_key)
+                        next_frontier.append(len(parents), new_key)
+                        parents.append(index, transition)
+                frontier.close()
+                frontier = next_frontier
+        except TokenOverflowError:
+            return self._result(visited, edges, deadlocks, False, None, spilled_levels, unbounded=True)
+        finally:
+            frontier.close()
+            visited.close()
+            parents.close()
+        return self._result(visited, edges, deadlocks, complete, None, spilled_levels)
+
+    @staticmethod
+    def _trace(parents, index):
+        trace = []
+        parent, transition = parents.get(index)
+        while parent >= 0:
+            trace.append(transition)
+            parent, transition = parents.get(parent)
+        trace.reverse()
+        return trace
+
+    def _result(self, visited, edges, deadlocks, complete, trace, spilled_levels, unbounded=False):
+        violation = None
+        names = None
+        if trace is not None:
+            # 沿最短路径重放一次监视器，得到与 simulate 相同格式的报告
+            monitor = ViolationMonitor()
+            hosts = self.net.hosts
+            for step, transition in enumerate(trace):
+                event = self.net.event_types[transition]
+                if event != SEND and event != RECEIVE:
+                    continue
+                monitor.observe(step, 'send' if event == SEND else 'receive',
+                                hosts[self.net.event_hosts[transition]])
+            violation = monitor.first
+            names = [self.net.transitions[t] for t in trace]
+        return ReachabilityResult(self.net, len(visited), edges, deadlocks, complete, names, violation,
+                                  spilled_levels, visited.spilled, unbounded)
+
+
+class StubbornExplorer(ReachabilityExplorer):
+    """
+    使用顽固集（stubborn set）做偏序归约的深度优先可达性搜索
+
+    在每个标记上从弧结构计算顽固集 S，只扩展 S 中启用的转换：
+        S 中启用的转换 t：所有从 t 的输入位置消耗标记的转换都加入 S（它们可能与 t 冲突）
+        S 中未启用的转换 t：选一个标记不足的输入位置 p，所有会增加 p 的转换都加入 S
+        可见性：S 中有启用的发送/接收转换时，所有发送/接收转换都加入 S
+    发送和接收是监视器唯一能观察到的转换。再加上循环条件（归约后的后继不能在DFS栈上，
+    否则换一个顽固集或完全展开），归约后的状态空间中违规是否可达与完整搜索相同，
+    但找到的路径不一定是最短的。
+    """
+
+    def __init__(self, net, *args, **kwargs):
+        super().__init__(net, *args, **kwargs)
+        net = self.net
+        n = net.n_transitions
+        # 顽固集的计算逐个转换进行，使用 Python 列表比逐元素访问 numpy 数组快得多
+        self.inputs = [net.pre_places[net.pre_offsets[t]:net.pre_offsets[t + 1]].tolist()
+                       for t in range(n)]
+        self.input_weights = [net.pre_weights[net.pre_offsets[t]:net.pre_offsets[t + 1]].tolist()
+                              for t in range(n)]
+        self.consumers = [[] for _ in range(net.n_places)]   # 位置 -> 从它消耗标记的转换
+        self.producers = [[] for _ in range(net.n_places)]   # 位置 -> 净增加它的标记的转换
+        for t in range(n):
+            for p in self.inputs[t]:
+                self.consumers[p].append(t)
+            start, end = net.delta_offsets[t], net.delta_offsets[t + 1]
+            for p, d in zip(net.delta_places[start:end].tolist(), net.delta_values[start:end].tolist()):
+                if d > 0:
+                    self.producers[p].append(t)
+        self.is_visible = (net.event_types != 0).tolist()
+        self.visible = [t for t in range(n) if self.is_visible[t]]
+
+    def stubborn_set(self, marking, seed, enabled_set):
+        """
+        从启用的转换 seed 出发计算顽固集，返回其中启用的转换列表
+
+        marking 是标记列表，enabled_set 是启用转换的集合。
+        """
+        stubborn = {seed}
+        stack = [seed]
+        visible_added = False
+        result = []
+        while stack:
+            t = stack.pop()
+            if t in enabled_set:
+                result.append(t)
+                related = [u for p in self.inputs[t] for u in self.consumers[p]]
+                if self.is_visible[t] and not visible_added:
+                    visible_added = True
+                    related.extend(self.visible)
+            else:
+                # 标记不足的输入位置（scapegoat），只有增加它的转换才能使 t 启用
+                for p, weight in zip(self.inputs[t], self.input_weights[t]):
+                    if marking[p] < weight:
+                        break
+                related = self.producers[p]
+            for u in related:
+                if u not in stubborn:
+                    stubborn.add(u)
+                    stack.append(u)
+        return sorted(result)
+
+    def candidate_sets(self, marking, enabled):
+        """
+        依次生成以各个启用转换为起点的顽固集，最后是全部启用的转换
+
+        不可见的转换排在前面，它们的顽固集通常很小且不含发送/接收；
+        候选集合按需计算，第一个满足循环条件的集合就会被采用。
+        """
+        enabled = enabled.tolist()
+        enabled_set = set(enabled)
+        marking = marking.tolist()
+        seen = set()
+        for seed in sorted(enabled, key=self.is_visible.__getitem__):
+            candidate = tuple(self.stubborn_set(marking, seed, enabled_set))
+            if len(candidate) < len(enabled) and candidate not in seen:
+                seen.add(candidate)
+                yield candidate
+        yield tuple(enabled)
+
+    def _expand(self, marking, mask, on_stack):
+        """选择第一个满足循环条件的候选集合，返回 [(转换, 后继状态键或None)]"""
+        enabled = self.net.enabled(marking)
+        if len(enabled) == 0:
+            return None
+        for candidate in self.candidate_sets(marking, enabled):
+            steps = [(t, self._step(marking, mask, t)) for t in candidate]
+            if len(candidate) == len(enabled) or not any(
+                    new_key is not None and new_key in on_stack for _, new_key in steps):
+                return steps
+
+    def explore(self, max_states=None):
+        """深度优先搜索归约后的状态空间，遇到第一个违规时停止，参数同 ReachabilityExplorer.explore"""
+        net = self.net
+        try:
+            root = self.pack(net.initial_marking, 0)
+        except TokenOverflowError:
+            return ReachabilityResult(net, 0, 0, 0, False, unbounded=True)
+        visited, parents = self._storage(root)
+        try:
+            return self._search(root, visited, parents, max_states)
+        finally:
+            visited.close()
+            parents.close()
+
+    def _search(self, root, visited, parents, max_states):
+        on_stack = set()
+        visited.add(root)
+        parents.append(-1, -1)
+        edges = deadlocks = 0
+        complete = True
+
+        try:
+            # 状态先放到栈上再选择顽固集，自环也算回到栈上的状态
+            on_stack.add(root)
+            marking, mask = self.unpack(root)
+            steps = self._expand(marking, mask, on_stack)
+            if steps is None:
+                return self._result(visited, 0, 1, True, None, 0)
+            stack = [(0, root, steps)]
+            while stack:
+                index, key, steps = stack[-1]
+                if not steps:
+                    stack.pop()
+                    on_stack.discard(key)
+                    continue
+                transition, new_key = steps.pop()
+                edges += 1
+                if new_key is None:
+                    trace = self._trace(parents, index) + [transition]
+                    return self._result(visited, edges, deadlocks, False, trace, 0)
+                if new_key in visited:
+                    continue
+                if max_states and len(visited) >= max_states:
+                    complete = False
+                    continue
+                new_index = len(parents)
+                visited.add(new_key)
+                parents.append(index, transition)
+                on_stack.add(new_key)
+                marking, mask = self.unpack(new_key)
+                new_steps = self._expand(marking, mask, on_stack)
+                if new_steps is None:
+                    on_stack.discard(new_key)
+                    deadlocks += 1
+                    continue
+                stack.append((new_index, new_key, new_steps))
+            return self._result(visited, edges, deadlocks, complete, None, 0)
+        except TokenOverflowError:
+            return self._result(visited, edges, deadlocks, False, None, 0, unbounded=True)
+
+
+def find_violation(net, reduce=False, **options):
+    """
+    搜索违规路径，其余参数同 ReachabilityExplorer
+
+    reduce 为 True 时使用顽固集偏序归约的深度优先搜索，访问的状态少得多，但路径不一定最短。
+    """
+    explorer_class = StubbornExplorer if reduce else ReachabilityExplorer
+    return explorer_class(net, **options).explore()
+
+
+def main():
+    from Petri_simulation import parse_input
+
+    print("Petri网络可达性分析")
+    print("读取网络配置...")
+    net = parse_input()
+    reduce = input("使用偏序归约? (y/n): ").strip().lower() == 'y'
+    result = find_violation(net, reduce=reduce)
+    print(f"访问了 {result.states} 个状态，{result.edges} 次转换，{result.deadlocks} 个死锁状态")
+    if result.spilled_states:
+        print(f"超出内存预算，其中 {result.spilled_states} 个已访问状态转存到了磁盘")
+    if result.found:
+        host, step1, step2 = result.violation
+        print(f"\n发现满足条件的情况: 主机 {host} 在步骤 {step1} 和 {step2} 接收了数据包，"
+              f"但在这两次接收之间没有任何主机发送新的数据包。")
+        print(("路径: " if reduce else "最短路径: ") + " -> ".join(result.trace))
+    elif result.unbounded:
+        print("\n标记数超过状态键的表示范围，搜索已停止，网络可能是无界的，"
+              "可以用 petri_coverability 分析各位置的上界。")
+    elif result.complete:
+        print("\n所有可达状态中都不会出现该情况。")
+    else:
+        print("\n达到状态数上限，搜索未完成，未发现符合条件的情况。")
+
+
+if __name__ == "__main__":
+    main()
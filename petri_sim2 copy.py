@@ -1,14 +1,147 @@
 import random
 import time
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
 import tkinter as tk
 from tkinter import simpledialog, messagebox, scrolledtext
 
+class HistoryLog:
+    """
+    状态历史的紧凑记录
+
+    每一步只记录触发的转换编号（array 中的 4 字节整数），每隔 checkpoint_interval 步
+    保存一次完整的标记。取第 i 步的状态时从它之前最近的检查点开始重放，最多重放
+    checkpoint_interval 步。用法与原来的状态列表相同：len(history) 是记录的总步数，
+    history[i] 返回第 i 步之后的 {位置: 标记数} 字典，支持负数下标。
+
+    max_steps 不为 None 时是环形缓冲：只保留最近的至少 max_steps 步（最多约两倍），
+    更早的记录被丢弃，访问它们会引发 IndexError，first 是最早仍可访问的下标。
+    """
+
+    LOAD = -1  # 转换编号为 -1 的记录表示加载了一个完整状态
+
+    def __init__(self, checkpoint_interval=64, max_steps=None):
+        if checkpoint_interval < 1:
+            raise ValueError("检查点间隔必须大于0")
+        if max_steps is not None and max_steps < 1:
+            raise ValueError("保留的步数必须大于0")
+        self.checkpoint_interval = checkpoint_interval
+        self.max_steps = max_steps
+        self.place_names = []
+        self.place_index = {}
+        self.deltas = []  # 转换编号 -> ((位置下标, 变化量), ...)
+        self.transition_names = []
+        self.clear()
+
+    def clear(self):
+        self.first = 0                      # 最早仍可访问的下标
+        self.total = 0                      # 记录的总步数
+        self.steps = array('i')             # 下标 first 开始的每一步的转换编号
+        self.checkpoint_steps = array('q')  # 检查点所在的下标，递增
+        self.checkpoints = array('q')       # 检查点的标记，按 place_names 的顺序逐行排列
+        self.current = array('q', [0] * len(self.place_names))
+
+    def add_transition(self, name, inputs, outputs):
+        """登记一个转换规则，返回它的编号；同名的规则被修改后会得到新的编号"""
+        changes = defaultdict(int)
+        for place, tokens in inputs.items():
+            changes[self.place_index[place]] -= tokens
+        for place, tokens in outputs.items():
+            changes[self.place_index[place]] += tokens
+        self.deltas.append(tuple((p, d) for p, d in sorted(changes.items()) if d))
+        self.transition_names.append(name)
+        return len(self.deltas) - 1
+
+    def record_state(self, state):
+        """记录一个完整状态（例如加载初始状态），位置集合改变时清空之前的记录和登记的转换"""
+        if list(state) != self.place_names:
+            self.place_names = list(state)
+            self.place_index = {place: i for i, place in enumerate(self.place_names)}
+            self.deltas = []
+            self.transition_names = []
+            self.clear()
+        self.current = array('q', state.values())
+        self._append(self.LOAD, checkpoint=True)
+
+    def record(self, transition_id):
+        """记录一次转换触发"""
+        current = self.current
+        for place, delta in self.deltas[transition_id]:
+            current[place] += delta
+        self._append(transition_id, checkpoint=self.total % self.checkpoint_interval == 0)
+
+    def _append(self, transition_id, checkpoint):
+        if checkpoint:
+            self.checkpoint_steps.append(self.total)
+            self.checkpoints.extend(self.current)
+        self.steps.append(transition_id)
+        self.total += 1
+        if self.max_steps is not None and self.total - self.first >= 2 * self.max_steps:
+            self._drop()
+
+    def _drop(self):
+        """丢弃最近 max_steps 步之前的记录，保留覆盖它们所需的最近一个检查点"""
+        keep = bisect_right(self.checkpoint_steps, self.total - self.max_steps) - 1
+        start = self.checkpoint_steps[keep]
+        del self.steps[:start - self.first]
+        del self.checkpoint_steps[:keep]
+        del self.checkpoints[:keep * len(self.place_names)]
+        self.first = start
+
+    def marking(self, index):
+        """第 index 步之后的标记（array，按 place_names 的顺序）"""
+        if index < 0:
+            index += self.total
+        if not self.first <= index < self.total:
+            raise IndexError("历史记录下标超出范围")
+        k = bisect_right(self.checkpoint_steps, index) - 1
+        width = len(self.place_names)
+        marking = self.checkpoints[k * width:(k + 1) * width]
+        for step in range(self.checkpoint_steps[k] + 1, index + 1):
+            for place, delta in self.deltas[self.steps[step - self.first]]:
+                marking[place] += delta
+        return marking
+
+    def transition_at(self, index):
+        """第 index 步触发的转换名称，加载状态的记录返回 None"""
+        if index < 0:
+            index += self.total
+        if not self.first <= index < self.total:
+            raise IndexError("历史记录下标超出范围")
+        transition_id = self.steps[index - self.first]
+        return None if transition_id == self.LOAD else self.transition_names[transition_id]
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        return dict(zip(self.place_names, self.marking(index)))
+
+    def __iter__(self):
+        """按顺序遍历所有仍可访问的状态，每一步只应用一次变化量"""
+        if self.first == self.total:
+            return
+        marking = self.marking(self.first)
+        yield dict(zip(self.place_names, marking))
+        width = len(self.place_names)
+        for index in range(self.first + 1, self.total):
+            transition_id = self.steps[index - self.first]
+            if transition_id == self.LOAD:
+                k = bisect_right(self.checkpoint_steps, index) - 1
+                marking = self.checkpoints[k * width:(k + 1) * width]
+            else:
+                for place, delta in self.deltas[transition_id]:
+                    marking[place] += delta
+            yield dict(zip(self.place_names, marking))
+
+
 class PetriNetSimulator:
-    def __init__(self):
+    def __init__(self, checkpoint_interval=64, max_history=None):
         self.places = {}  # 存储位置及其标记数
         self.transitions = {}  # 存储转换及其输入输出规则
-        self.history = []  # 存储状态历史
+        self.history = HistoryLog(checkpoint_interval, max_history)  # 存储状态历史（增量记录）
+        self.history_ids = {}  # 转换名称 -> 在 history 中登记的编号
         self.conditions_met = True  # 跟踪条件是否满足
         self.last_received_host = None  # 记录最后接收数据包的主机
         self.last_received_time = 0  # 记录最后接收数据包的时间
@@ -21,7 +154,8 @@ class PetriNetSimulator:
         for part in parts:
             place, tokens = part.split(':')
             self.places[place.strip()] = int(tokens.strip())
-        self.history.append(self.get_current_state())
+        self.history.record_state(self.get_current_state())
+        self.history_ids.clear()
     
     def add_transition(self, name, inputs, outputs):
         """添加转换规则"""
@@ -41,6 +175,7 @@ class PetriNetSimulator:
                 output_dict[place.strip()] = int(tokens.strip())
         
         self.transitions[name] = {'inputs': input_dict, 'outputs': output_dict}
+        self.history_ids.pop(name, None)
     
     def get_current_state(self):
         """获取当前状态"""
@@ -72,8 +207,13 @@ class PetriNetSimulator:
         for place, tokens in transition['outputs'].items():
             self.places[place] += tokens
         
-        # 记录状态变化
-        self.history.append(self.get_current_state())
+        # 记录状态变化：只记录转换编号，不复制整个状态
+        transition_id = self.history_ids.get(transition_name)
+        if transition_id is None:
+            transition_id = self.history.add_transition(
+                transition_name, transition['inputs'], transition['outputs'])
+            self.history_ids[transition_name] = transition_id
+        self.history.record(transition_id)
         
         # 检查条件
         self.check_conditions(transition_name)
@@ -0,0 +1,354 @@
+CHAR, SPLIT, JMP, SAVE, MATCH, RESET, REPEAT = range(7)
+
+
+def parse_regex(regex):
+    """
+    将正则表达式解析为语法树，文法与 graphviz_vv.regex_to_nfa 相同：
+    | 选择，* 克莱尼星号，+ 正闭包，? 可选，{m,n} 计数重复，() 分组，相邻或用 . 显式连接
+
+    返回 (语法树, 分组数)。语法树节点为元组：
+        ('char', c) / ('empty',) / ('cat', [子节点]) / ('alt', 左, 右)
+        ('star', 子节点) / ('plus', 子节点) / ('opt', 子节点)
+        ('repeat', 子节点, 下限, 上限或None) / ('group', 编号, 子节点)
+    """
+    pos = 0
+    group_count = 0
+
+    def parse_alt():
+        nonlocal pos
+        node = parse_cat()
+        while pos < len(regex) and regex[pos] == '|':
+            pos += 1
+            node = ('alt', node, parse_cat())
+        return node
+
+    def parse_cat():
+        nonlocal pos
+        items = []
+        while pos < len(regex) and regex[pos] not in '|)':
+            if regex[pos] == '.':
+                pos += 1
+                continue
+            items.append(parse_star())
+        if not items:
+            return ('empty',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def parse_star():
+        nonlocal pos
+        node = parse_atom()
+        while pos < len(regex) and regex[pos] in '*+?{':
+            char = regex[pos]
+            if char == '{':
+                node = ('repeat', node) + parse_bounds()
+                continue
+            pos += 1
+            node = ({'*': 'star', '+': 'plus', '?': 'opt'}[char], node)
+        return node
+
+    def parse_bounds():
+        nonlocal pos
+        end = regex.find('}', pos)
+        if end == -1:
+            raise ValueError(f"无效的表达式: 位置 {pos} 的 {{ 没有匹配的 }}")
+        low, sep, high = regex[pos + 1:end].partition(',')
+        if not low.strip().isdigit() or (high.strip() and not high.strip().isdigit()):
+            raise ValueError(f"无效的表达式: 位置 {pos} 的计数重复格式错误")
+        low = int(low)
+        high = low if not sep else (int(high) if high.strip() else None)
+        if high is not None and high < low:
+            raise ValueError(f"无效的表达式: 位置 {pos} 的计数重复上限小于下限")
+        pos = end + 1
+        return low, high
+
+    def parse_atom():
+        nonlocal pos, group_count
+        char = regex[pos]
+        if char == '(':
+            pos += 1
+            group_count += 1
+            index = group_count
+            node = parse_alt()
+            if pos >= len(regex) or regex[pos] != ')':
+                raise ValueError(f"无效的表达式: 位置 {pos} 缺少右括号")
+            pos += 1
+            return ('group', index, node)
+        if char in '*+?{':
+            raise ValueError(f"无效的表达式: 位置 {pos} 的 {char} 操作符没有操作数")
+        pos += 1
+        return ('char', char)
+
+    tree = parse_alt()
+    if pos != len(regex):
+        raise ValueError(f"无效的表达式: 位置 {pos} 的右括号没有匹配的左括号")
+    return tree, group_count
+
+
+def compile_program(tree, group_count):
+    """
+    把语法树编译成Pike VM指令序列（带标签的Thompson NFA）
+
+    每条指令是一个列表: [CHAR, c] / [SPLIT, x, y] / [JMP, x] / [SAVE, k] / [MATCH]
+    SPLIT 优先走 x，因此选择是左优先、星号是贪婪的，与 Python re 的语义一致。
+
+    计数重复 x{m,n} 不展开，而是使用计数器（与 counted_nfa.CountedNFA 相同的思路）：
+        [RESET, k]                   把计数器 k 置为 0
+        [REPEAT, k, loop, m, n]      完成一次重复后计数器加一，未达到上限时优先跳回 loop，
+                                     达到下限时可以继续执行下一条指令（同时把计数器清零）
+    因此程序长度与上下限无关，线程的状态是 (指令位置, 计数器取值)。
+    """
+    program = []
+    counters = 0
+
+    def emit(node):
+        kind = node[0]
+        if kind == 'char':
+            program.append([CHAR, node[1]])
+        elif kind == 'empty':
+            pass
+        elif kind == 'cat':
+            for item in node[1]:
+                emit(item)
+        elif kind == 'alt':
+            split = len(program)
+            program.append([SPLIT, split + 1, None])
+            emit(node[1])
+            jump = len(program)
+            program.append([JMP, None])
+            program[split][2] = len(program)
+            emit(node[2])
+            program[jump][1] = len(program)
+        elif kind == 'star':
+            split = len(program)
+            program.append([SPLIT, split + 1, None])
+            emit(node[1])
+            program.append([JMP, split])
+            program[split][2] = len(program)
+        elif kind == 'plus':
+            loop = len(program)
+            emit(node[1])
+            program.append([SPLIT, loop, len(program) + 1])
+        elif kind == 'opt':
+            split = len(program)
+            program.append([SPLIT, split + 1, None])
+            emit(node[1])
+            program[split][2] = len(program)
+        elif kind == 'repeat':
+            nonlocal counters
+            body, low, high = node[1], node[2], node[3]
+            if high == 0:
+                return  # x{0,0} 只匹配空串
+            counter = counters
+            counters += 1
+            skip = None
+            if low == 0:
+                skip = len(program)
+                program.append([SPLIT, skip + 1, None])  # 贪婪：优先进入重复
+            program.append([RESET, counter])
+            loop = len(program)
+            emit(body)
+            program.append([REPEAT, counter, loop, low, high])
+            if skip is not None:
+                program[skip][2] = len(program)
+        elif kind == 'group':
+            program.append([SAVE, 2 * node[1]])
+            emit(node[2])
+            program.append([SAVE, 2 * node[1] + 1])
+
+    program.append([SAVE, 0])
+    emit(tree)
+    program.append([SAVE, 1])
+    program.append([MATCH])
+    return program
+
+
+def build_onepass(program):
+    """
+    尝试为程序构建one-pass DFA
+
+    入口点是程序开头和每条CHAR指令之后的位置。若从每个入口点沿ε路径出发，
+    任一字符最多只有一条路径可走、MATCH 也最多只有一条路径可达，
+    则匹配过程不需要维护线程列表。
+
+    返回:
+        {入口点: ({字符: (下一个入口点, 途经的SAVE列表)}, 到达MATCH途经的SAVE列表或None)}
+        如果程序不是one-pass的（或者含有计数器指令），返回 None
+    """
+    if any(inst[0] in (RESET, REPEAT) for inst in program):
+        return None
+    entries = [0] + [pc + 1 for pc, inst in enumerate(program) if inst[0] == CHAR]
+    table = {}
+    for entry in entries:
+        edges = {}
+        match_saves = None
+        visited = set()
+        stack = [(entry, ())]
+        while stack:
+            pc, saves = stack.pop()
+            if pc in visited:
+                # 同一条指令经由两条ε路径到达，说明存在歧义
+                return None
+            visited.add(pc)
+            inst = program[pc]
+            op = inst[0]
+            if op == CHAR:
+                if inst[1] in edges:
+                    return None
+                edges[inst[1]] = (pc + 1, saves)
+            elif op == MATCH:
+                match_saves = saves
+            elif op == JMP:
+                stack.append((inst[1], saves))
+            elif op == SPLIT:
+                stack.append((inst[2], saves))
+                stack.append((inst[1], saves))
+            elif op == SAVE:
+                stack.append((pc + 1, saves + (inst[1],)))
+        table[entry] = (edges, match_saves)
+    return table
+
+
+class PikeVM:
+    """
+    线性时间的子匹配提取引擎
+
+    使用Pike VM同时推进所有NFA线程，每个程序位置最多保留一个线程，
+    因此时间复杂度为 O(n·m)，不会出现回溯导致的指数级耗时。
+    如果正则表达式是one-pass的，fullmatch 会改用one-pass DFA直接执行。
+    """
+
+    def __init__(self, regex):
+        tree, self.group_count = parse_regex(regex)
+        self.program = compile_program(tree, self.group_count)
+        self.counter_count = sum(1 for inst in self.program if inst[0] == RESET)
+        self.onepass = build_onepass(self.program)
+
+    def _add_thread(self, threads, seen, pc, captures, counters, position):
+        """沿ε路径把线程加入列表，按优先级顺序展开；同一 (位置, 计数器取值) 只保留一个线程"""
+        stack = [(pc, captures, counters)]
+        program = self.program
+        while stack:
+            pc, captures, counters = stack.pop()
+            if (pc, counters) in seen:
+                continue
+            seen.add((pc, counters))
+            inst = program[pc]
+            op = inst[0]
+            if op == JMP:
+                stack.append((inst[1], captures, counters))
+            elif op == SPLIT:
+                # 先压入低优先级分支，保证高优先级分支先展开
+                stack.append((inst[2], captures, counters))
+                stack.append((inst[1], captures, counters))
+            elif op == SAVE:
+                captures = list(captures)
+                captures[inst[1]] = position
+                stack.append((pc + 1, captures, counters))
+            elif op == RESET:
+                k = inst[1]
+                stack.append((pc + 1, captures, counters[:k] + (0,) + counters[k + 1:]))
+            elif op == REPEAT:
+                _, k, loop, low, high = inst
+                # 没有上限时，超过下限的次数没有区别，饱和在下限处保证线程数有限
+                value = counters[k] + 1 if high is not None else min(counters[k] + 1, max(low, 1))
+                if value >= low:
+                    stack.append((pc + 1, captures, counters[:k] + (0,) + counters[k + 1:]))
+                if high is None or value < high:
+                    stack.append((loop, captures, counters[:k] + (value,) + counters[k + 1:]))
+            else:
+                threads.append((pc, captures, counters))
+
+    def _run(self, text, anchored):
+        """执行Pike VM，返回最高优先级匹配的捕获数组"""
+        program = self.program
+        slots = [None] * (2 * self.group_count + 2)
+        initial = (0,) * self.counter_count
+        threads = []
+        self._add_thread(threads, set(), 0, slots, initial, 0)
+        matched = None
+        for position in range(len(text) + 1):
+            char = text[position] if position < len(text) else None
+            next_threads = []
+            seen = set()
+            for pc, captures, counters in threads:
+                inst = program[pc]
+                if inst[0] == MATCH:
+                    if not anchored or position == len(text):
+                        matched = captures
+                        # 低优先级的线程不再需要
+                        break
+                elif char is not None and inst[1] == char:
+                    self._add_thread(next_threads, seen, pc + 1, captures, counters, position + 1)
+            # 非锚定搜索时，在还没有找到匹配之前每个位置都可以开始新的线程
+            if not anchored and matched is None and position < len(text):
+                self._add_thread(next_threads, seen, 0, slots, initial, position + 1)
+            threads = next_threads
+            if not threads:
+                break
+        return matched
+
+    def _run_onepass(self, text):
+        """使用one-pass DFA执行完全匹配"""
+        captures = [None] * (2 * self.group_count + 2)
+        entry = 0
+        position = 0
+        for char in text:
+            edges, _ = self.onepass[entry]
+            edge = edges.get(char)
+            if edge is None:
+                return None
+            entry, saves = edge
+            for slot in saves:
+                captures[slot] = position
+            position += 1
+        _, match_saves = self.onepass[entry]
+        if match_saves is None:
+            return None
+        for slot in match_saves:
+            captures[slot] = position
+        return captures
+
+    @staticmethod
+    def _spans(captures):
+        """把捕获数组转换为 [(开始, 结束) 或 None] 列表，下标0为整个匹配"""
+        if captures is None:
+            return None
+        spans = []
+        for i in range(0, len(captures), 2):
+            start, end = captures[i], captures[i + 1]
+            spans.append((start, end) if start is not None and end is not None else None)
+        return spans
+
+    def fullmatch(self, text):
+        """
+        完全匹配并提取子匹配
+
+        返回:
+            如果匹配成功，返回每个分组的 (开始, 结束) 偏移量列表（下标0为整个匹配，
+            未参与匹配的分组为 None）；否则返回 None
+        """
+        if self.onepass is not None:
+            return self._spans(self._run_onepass(text))
+        return self._spans(self._run(text, anchored=True))
+
+    def search(self, text):
+        """查找最左边的匹配（左优先、贪婪），返回值格式同 fullmatch"""
+        return self._spans(self._run(text, anchored=False))
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    text = input("请输入要匹配的字符串: ")
+    spans = PikeVM(regex).fullmatch(text)
+    if spans is None:
+        print("不匹配")
+        return
+    for index, span in enumerate(spans):
+        if span is None:
+            print(f"分组 {index}: 未参与匹配")
+        else:
+            print(f"分组 {index}: {span} '{text[span[0]:span[1]]}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from graphviz_vv import match_dfa, RepeatTooLargeError
+from gradio_backend import compile_min_dfa, compile_counted_dfa
+
+MAX_BODY = 64 * 1024 * 1024  # 请求体大小上限（字节）
+
+
+def dfa_stats(min_dfa):
+    """最小化DFA的统计信息"""
+    return {
+        'states': len(min_dfa.states),
+        'accepting': len(min_dfa.end_states),
+        'transitions': len(min_dfa.transitions),
+        'alphabet': sorted(min_dfa.alphabet),
+    }
+
+
+def serialize_dfa(min_dfa):
+    """把DFA序列化为可以直接写入JSON的字典"""
+    return {
+        'start': min_dfa.start_state.id,
+        'accepting': sorted(state.id for state in min_dfa.end_states),
+        'transitions': [[from_id, symbol, to_id]
+                        for (from_id, symbol), to_id in sorted(min_dfa.transitions.items())],
+    }
+
+
+def process_item(item, include_dfa=False):
+    """
+    处理一个 {"pattern": 表达式, "inputs": [字符串, ...]} 请求项
+
+    编译结果由 compile_min_dfa 在请求之间共享。表达式非法时返回带 error 字段的结果，
+    不影响同一批中的其他项。计数重复的上下限太大、无法构建显式DFA时，
+    改用带计数器的惰性DFA匹配，stats（和 dfa）为 null，原因写在 dfa_unavailable 字段中。
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('pattern'), str):
+        return {'error': "请求项必须包含字符串类型的 pattern"}
+    pattern = item['pattern']
+    inputs = item.get('inputs', [])
+    if not isinstance(inputs, list) or not all(isinstance(text, str) for text in inputs):
+        return {'pattern': pattern, 'error': "inputs 必须是字符串列表"}
+    try:
+        try:
+            min_dfa = compile_min_dfa(pattern)
+        except RepeatTooLargeError as e:
+            min_dfa, unavailable = None, str(e)
+            counted_dfa = compile_counted_dfa(pattern)
+    except Exception as e:
+        return {'pattern': pattern, 'error': str(e)}
+    if min_dfa is None:
+        result = {
+            'pattern': pattern,
+            'matches': [counted_dfa.accepts(text) for text in inputs],
+            'stats': None,
+            'dfa_unavailable': unavailable,
+        }
+    else:
+        result = {
+            'pattern': pattern,
+            'matches': [match_dfa(min_dfa, text) for text in inputs],
+            'stats': dfa_stats(min_dfa),
+        }
+    if include_dfa:
+        result['dfa'] = None if min_dfa is None else serialize_dfa(min_dfa)
+    return result
+
+
+class RegexAPIHandler(BaseHTTPRequestHandler):
+    """
+    JSON 接口
+
+    POST /match  请求体: {"items": [{"pattern": ..., "inputs": [...]}, ...], "include_dfa": false}
+                 响应: NDJSON，每个请求项一行 {"index": 下标, ...}，以分块传输编码边处理边发送
+    GET /health  返回编译缓存的统计信息
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': "未知的路径"})
+            return
+        self._send_json(200, {'status': 'ok', 'cache': compile_min_dfa.cache_info()._asdict(),
+                              'counted_cache': compile_counted_dfa.cache_info()._asdict()})
+
+    def do_POST(self):
+        if self.path != '/match':
+            self._send_json(404, {'error': "未知的路径"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            self._send_json(413, {'error': f"请求体超过 {MAX_BODY} 字节"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send_json(400, {'error': f"无效的JSON: {e}"})
+            return
+        items = request.get('items') if isinstance(request, dict) else None
+        if not isinstance(items, list):
+            self._send_json(400, {'error': "请求体必须包含 items 列表"})
+            return
+        include_dfa = bool(request.get('include_dfa', False))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for index, item in enumerate(items):
+            result = {'index': index, **process_item(item, include_dfa)}
+            self._write_chunk(json.dumps(result, ensure_ascii=False).encode('utf-8') + b"\n")
+        self._write_chunk(b"")
+
+
+def serve(host='127.0.0.1', port=8000):
+    """启动多线程HTTP服务，直到被中断"""
+    server = ThreadingHTTPServer((host, port), RegexAPIHandler)
+    print(f"正则表达式 API 已启动: http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="正则表达式编译、匹配和导出的 JSON 接口")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import codecs
+
+from graphviz_vv import regex_to_nfa, nfa_to_dfa, minimize_dfa
+
+
+class StreamMatcher:
+    """
+    基于最小化DFA的增量匹配器，适用于分块到达、没有结尾的输入流
+
+    匹配器在块与块之间只保存当前的搜索状态（一个整数），不缓存任何历史输入。
+    每当某个子串在当前位置完成匹配，就立即产出该匹配的结束偏移量。
+    """
+
+    def __init__(self, regex, on_match=None):
+        nfa = regex_to_nfa(regex)
+        min_dfa = minimize_dfa(nfa_to_dfa(nfa))
+
+        # 把最小化DFA的转移整理成 状态ID -> {符号: 目标状态ID}
+        self._delta = {state.id: {} for state in min_dfa.states}
+        for (from_id, symbol), to_id in min_dfa.transitions.items():
+            self._delta[from_id][symbol] = to_id
+        self._dfa_start = min_dfa.start_state.id
+        self._dfa_accepting = frozenset(state.id for state in min_dfa.end_states)
+
+        # 搜索状态 = 当前活跃的最小化DFA状态集合，按需构建并编号
+        self._sets = []          # 搜索状态ID -> 最小化DFA状态集合
+        self._set_ids = {}       # 最小化DFA状态集合 -> 搜索状态ID
+        self._accepting = []     # 搜索状态ID -> 是否包含接受状态
+        self._cache = []         # 搜索状态ID -> {字符: 下一个搜索状态ID}
+        self._initial = self._intern(frozenset())
+
+        self.on_match = on_match  # 如果设置了回调，每个匹配完成时立即调用
+        self.state = self._initial
+        self.offset = 0           # 已消费的字符数
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _intern(self, dfa_states):
+        """为最小化DFA状态集合分配搜索状态ID"""
+        set_id = self._set_ids.get(dfa_states)
+        if set_id is None:
+            set_id = len(self._sets)
+            self._sets.append(dfa_states)
+            self._set_ids[dfa_states] = set_id
+            self._accepting.append(bool(dfa_states & self._dfa_accepting))
+            self._cache.append({})
+        return set_id
+
+    def _step(self, set_id, char):
+        """计算搜索状态读入一个字符后的下一个状态（带缓存）"""
+        next_id = self._cache[set_id].get(char)
+        if next_id is None:
+            targets = set()
+            # 每个位置都可能开始一个新的匹配，所以总是从起始状态再出发一次
+            for dfa_state in self._sets[set_id] | {self._dfa_start}:
+                target = self._delta[dfa_state].get(char)
+                if target is not None:
+                    targets.add(target)
+            next_id = self._intern(frozenset(targets))
+            self._cache[set_id][char] = next_id
+        return next_id
+
+    def feed(self, chunk):
+        """
+        输入一个数据块
+
+        参数:
+            chunk: str，或者 bytes/bytearray/memoryview（按UTF-8解码，
+                   跨块截断的多字节字符会保留到下一个块再处理）
+
+        返回:
+            本块中完成的所有匹配的结束偏移量列表（相对于整个流，以字符计）
+        """
+        if not isinstance(chunk, str):
+            chunk = self._decoder.decode(chunk)
+        return self._scan(chunk)
+
+    def finish(self):
+        """
+        结束当前流：处理解码器中剩余的字节，然后重置匹配器以便复用
+
+        返回:
+            剩余部分中完成的匹配结束偏移量列表
+        """
+        matches = self._scan(self._decoder.decode(b'', final=True))
+        self.reset()
+        return matches
+
+    def reset(self):
+        """丢弃当前搜索状态，从流的开头重新开始"""
+        self.state = self._initial
+        self.offset = 0
+        self._decoder.reset()
+
+    def _scan(self, text):
+        """在一段已解码的文本上推进搜索状态"""
+        matches = []
+        state = self.state
+        offset = self.offset
+        cache = self._cache
+        accepting = self._accepting
+        for char in text:
+            next_state = cache[state].get(char)
+            if next_state is None:
+                next_state = self._step(state, char)
+            state = next_state
+            offset += 1
+            if accepting[state]:
+                matches.append(offset)
+                if self.on_match:
+                    self.on_match(offset)
+        self.state = state
+        self.offset = offset
+        return matches
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    matcher = StreamMatcher(regex)
+    print("逐行输入数据块，输入空行结束:")
+    while True:
+        chunk = input()
+        if not chunk:
+            break
+        for end in matcher.feed(chunk):
+            print(f"匹配结束于偏移量 {end}")
+    for end in matcher.finish():
+        print(f"匹配结束于偏移量 {end}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import csv
+import html
+import json
+
+
+def index_states(automaton):
+    """建立 状态ID -> 状态 的索引，避免每次按ID查找都线性扫描状态列表"""
+    return {state.id: state for state in automaton.states}
+
+
+class TransitionTable:
+    """
+    自动机状态转移表的惰性视图
+
+    表格行在遍历时才逐行生成，不会一次性构建嵌套列表；
+    配合 page() 可以只生成某一页的行，内存占用与页大小成正比。
+    适用于 NFA.py / NFA2.py / graphviz_vv.py 中由 State 对象构成的NFA，
+    以及 graphviz_vv.DFA（转移保存在 (状态ID, 符号) -> 目标ID 字典中）。
+    """
+
+    def __init__(self, automaton, id_prefix='q', show_accepting=True, separator=',', epsilon_column=None):
+        self.automaton = automaton
+        self.index = index_states(automaton)
+        self.state_ids = sorted(self.index)
+        self.id_prefix = id_prefix
+        self.show_accepting = show_accepting
+        self.separator = separator
+        self.symbols = sorted(s for s in automaton.alphabet if s != 'ε')
+        # DFA 的转移保存在自动机上，而不是状态上
+        self.is_dfa = isinstance(getattr(automaton, 'transitions', None), dict)
+        if epsilon_column is None:
+            epsilon_column = not self.is_dfa and any('ε' in state.transitions for state in automaton.states)
+        self.has_epsilon = epsilon_column
+        self.end_ids = set(state.id for state in automaton.end_states)
+
+    def __len__(self):
+        """数据行数（不含表头）"""
+        return len(self.state_ids)
+
+    def header(self):
+        header = ["状态ID"]
+        if self.show_accepting:
+            header.append("是否接受状态")
+        header.extend(self.symbols)
+        if self.has_epsilon:
+            header.append('ε')
+        return header
+
+    def _cell(self, target_ids):
+        if not target_ids:
+            return "-"
+        return self.separator.join(f"{self.id_prefix}{t}" for t in target_ids)
+
+    def row(self, state_id):
+        """生成单个状态的表格行"""
+        row = [f"{self.id_prefix}{state_id}"]
+        if self.show_accepting:
+            row.append("是" if state_id in self.end_ids else "否")
+        if self.is_dfa:
+            transitions = self.automaton.transitions
+            for symbol in self.symbols:
+                target = transitions.get((state_id, symbol))
+                row.append(self._cell([] if target is None else [target]))
+        else:
+            transitions = self.index[state_id].transitions
+            for symbol in self.symbols:
+                row.append(self._cell([t.id for t in transitions.get(symbol, ())]))
+            if self.has_epsilon:
+                row.append(self._cell([t.id for t in transitions.get('ε', ())]))
+        return row
+
+    def rows(self, start=0, stop=None):
+        """按状态ID顺序惰性产出 [start, stop) 范围内的行"""
+        # 列表切片直接定位到起始行，不需要逐行跳过前面的状态
+        for state_id in self.state_ids[start:stop]:
+            yield self.row(state_id)
+
+    def page_count(self, page_size):
+        return max(1, -(-len(self) // page_size))
+
+    def page(self, page, page_size):
+        """产出第 page 页（从1开始）的行"""
+        start = (page - 1) * page_size
+        return self.rows(start, start + page_size)
+
+
+def iter_html(header, rows, highlight_column=1):
+    """
+    以字符串片段的形式流式生成HTML表格
+
+    highlight_column 列的值为"是"时（即接受状态）单元格使用绿色背景。
+    """
+    yield "<table border='1' cellpadding='5'><tr>"
+    yield ''.join(f"<th>{html.escape(str(cell))}</th>" for cell in header)
+    yield "</tr>"
+    for row in rows:
+        parts = ["<tr>"]
+        for i, cell in enumerate(row):
+            cell_style = ""
+            if i == highlight_column and cell == "是":
+                cell_style = " style='background-color: lightgreen;'"
+            parts.append(f"<td{cell_style}>{html.escape(str(cell))}</td>")
+        parts.append("</tr>")
+        yield ''.join(parts)
+    yield "</table>"
+
+
+def iter_csv(header, rows):
+    """以字符串片段的形式流式生成CSV，每次产出一行"""
+
+    class _Line:
+        def write(self, text):
+            return text
+
+    writer = csv.writer(_Line())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_json(header, rows):
+    """流式生成JSON：{"header": [...], "rows": [[...], ...]}"""
+    yield '{"header": ' + json.dumps(header, ensure_ascii=False) + ', "rows": ['
+    first = True
+    for row in rows:
+        yield ('' if first else ', ') + json.dumps(row, ensure_ascii=False)
+        first = False
+    yield ']}'
+
+
+FORMATS = {'html': iter_html, 'csv': iter_csv, 'json': iter_json}
+
+
+def export_table(table, fmt='html', page=None, page_size=500):
+    """
+    流式导出状态转移表
+
+    参数:
+        table: TransitionTable
+        fmt: 'html'、'csv' 或 'json'
+        page: 页码（从1开始），为 None 时导出全部行
+        page_size: 每页行数
+
+    返回:
+        字符串片段的生成器，可以逐段写入文件或HTTP响应
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    rows = table.rows() if page is None else table.page(page, page_size)
+    return FORMATS[fmt](table.header(), rows)
+
+
+def write_table(table, fp, fmt='csv', page=None, page_size=500):
+    """把状态转移表逐段写入文件对象，内存占用不随状态数增长"""
+    for chunk in export_table(table, fmt, page, page_size):
+        fp.write(chunk)
@@ -0,0 +1,109 @@
+import mmap
+from array import array
+
+from graphviz_vv import State, NFA, regex_to_nfa, nfa_to_dfa, minimize_dfa
+
+
+def nfa_to_byte_nfa(nfa):
+    """
+    将字符级NFA降低为字节级NFA：每个符号替换为其UTF-8字节序列
+
+    多字节字符会被展开成一条由中间状态串起来的字节链，转移符号为 0-255 的整数。
+    """
+    byte_nfa = NFA()
+    state_map = {}
+    for state in nfa.states:
+        new_state = byte_nfa.add_state(State(len(byte_nfa.states)))
+        state_map[state.id] = new_state
+        if state is nfa.start_state:
+            byte_nfa.set_start_state(new_state)
+        if state in nfa.end_states:
+            byte_nfa.add_end_state(new_state)
+
+    for state in nfa.states:
+        mapped_state = state_map[state.id]
+        for symbol, targets in state.transitions.items():
+            for target in targets:
+                mapped_target = state_map[target.id]
+                if symbol == 'ε':
+                    byte_nfa.add_transition(mapped_state, 'ε', mapped_target)
+                    continue
+                encoded = symbol.encode('utf-8')
+                current = mapped_state
+                # 除最后一个字节外，每个字节都通向一个新的中间状态
+                for byte in encoded[:-1]:
+                    middle = byte_nfa.add_state(State(len(byte_nfa.states)))
+                    byte_nfa.add_transition(current, byte, middle)
+                    current = middle
+                byte_nfa.add_transition(current, encoded[-1], mapped_target)
+    return byte_nfa
+
+
+class ByteDFA:
+    """
+    256列的字节DFA，直接在 bytes/bytearray/mmap/memoryview 上匹配
+
+    转移表是一个扁平的 array('l')，状态编号预先乘以256，
+    这样每读入一个字节只需要一次加法和一次下标访问。
+    """
+
+    def __init__(self, regex):
+        byte_nfa = nfa_to_byte_nfa(regex_to_nfa(regex))
+        min_dfa = minimize_dfa(nfa_to_dfa(byte_nfa))
+
+        # 最小化DFA的状态依次编号，最后额外加一个吸收所有输入的死状态
+        n_states = len(min_dfa.states)
+        self.dead = n_states * 256
+        self.table = array('l', [self.dead]) * ((n_states + 1) * 256)
+        for (from_id, byte), to_id in min_dfa.transitions.items():
+            self.table[from_id * 256 + byte] = to_id * 256
+        self.start = min_dfa.start_state.id * 256
+        self.accepting = frozenset(state.id * 256 for state in min_dfa.end_states)
+        self.n_states = n_states + 1
+
+    def run(self, data, state=None):
+        """
+        从给定状态出发读入一段字节数据，返回读完后的状态
+
+        可以对 mmap 或大文件分块多次调用，把上一次的返回值作为下一次的 state。
+        """
+        table = self.table
+        dead = self.dead
+        if state is None:
+            state = self.start
+        # 显式释放视图，避免 mmap 关闭时仍有导出的缓冲区
+        with memoryview(data) as view, view.cast('B') as octets:
+            for byte in octets:
+                state = table[state + byte]
+                if state == dead:
+                    break
+        return state
+
+    def is_accepting(self, state):
+        """判断状态是否为接受状态"""
+        return state in self.accepting
+
+    def fullmatch(self, data):
+        """整段字节数据是否与正则表达式完全匹配"""
+        return self.run(data) in self.accepting
+
+
+def main():
+    regex = input("请输入一个正则表达式: ")
+    path = input("请输入要匹配的文件路径: ")
+    byte_dfa = ByteDFA(regex)
+    with open(path, 'rb') as f:
+        # 空文件无法映射，直接按空输入处理
+        if f.seek(0, 2) == 0:
+            matched = byte_dfa.fullmatch(b'')
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                matched = byte_dfa.fullmatch(data)
+    if matched:
+        print("文件内容与正则表达式匹配")
+    else:
+        print("文件内容与正则表达式不匹配")
+
+
+if __name__ == "__main__":
+    main()